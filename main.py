@@ -4,6 +4,7 @@ Entry point for the application
 """
 import sys
 import os
+import multiprocessing
 
 # Add src directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
@@ -12,4 +13,6 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 from src.main import main
 
 if __name__ == '__main__':
+    # Needed for the metadata process pool in frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
     main()
@@ -5,8 +5,11 @@ import sys
 import os
 import re
 import json
+import mmap
 import string
+import multiprocessing
 import subprocess
+from collections import OrderedDict
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QTreeWidget, QTreeWidgetItem, QTextEdit, QLineEdit,
@@ -14,10 +17,30 @@ from PySide6.QtWidgets import (
     QProgressBar, QStatusBar, QMessageBox, QMenu, QComboBox,
     QDialog, QFormLayout, QDialogButtonBox, QTabWidget, QGridLayout
 )
-from PySide6.QtCore import Qt, QThread, Signal
+from PySide6.QtCore import Qt, QThread, QTimer, Signal, QObject, QRunnable, QThreadPool, QRegularExpression
 from PySide6.QtGui import QFont, QColor, QTextCharFormat, QTextCursor, QAction, QIcon
 from .search_engine import SearchEngine, SearchMatch
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+
+def _safe_stat_value(path, attr):
+    """Return a stat attribute for path using a single stat call (0 if unavailable)"""
+    try:
+        return getattr(os.stat(path), attr)
+    except OSError:
+        return 0
+
 
 class PreferencesDialog(QDialog):
     """Preferences dialog window"""
@@ -614,6 +637,90 @@ class SearchWorker(QThread):
     def stop(self):
         """Stop the search"""
         self._is_running = False
+        self.search_engine.cancel()
+
+
+def read_image_preview_metadata(file_path):
+    """Extract image and file system metadata for the preview pane"""
+    from PIL import Image
+    from PIL.ExifTags import TAGS, GPSTAGS
+    from datetime import datetime
+    
+    metadata = {}
+    
+    with Image.open(file_path) as img:
+        # File system info
+        stat_info = os.stat(file_path)
+        metadata['File_Size'] = f"{stat_info.st_size / 1024:.2f} KB"
+        metadata['File_Created'] = datetime.fromtimestamp(stat_info.st_ctime).strftime('%Y-%m-%d %H:%M:%S')
+        metadata['File_Modified'] = datetime.fromtimestamp(stat_info.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
+        
+        # Basic image info
+        metadata['Format'] = img.format or 'Unknown'
+        metadata['Mode'] = img.mode
+        metadata['Size'] = f"{img.width}x{img.height}"
+        
+        # Try to get EXIF data using getexif() (newer API)
+        try:
+            exif = img.getexif()
+            if exif:
+                for tag_id, value in exif.items():
+                    tag_name = TAGS.get(tag_id, f"Tag_{tag_id}")
+                    
+                    # Handle GPS data specially
+                    if tag_name == "GPSInfo":
+                        try:
+                            gps_data = {GPSTAGS.get(gps_tag_id, f"GPS_{gps_tag_id}"): str(value[gps_tag_id]) 
+                                       for gps_tag_id in value}
+                            metadata['GPS_Info'] = str(gps_data)
+                        except Exception:
+                            metadata['GPS_Info'] = str(value)
+                    else:
+                        # Convert value to string, handle bytes
+                        if isinstance(value, bytes):
+                            try:
+                                value = value.decode('utf-8', errors='ignore')
+                            except Exception:
+                                value = str(value)[:100]
+                        elif isinstance(value, (tuple, list)) and len(str(value)) > 100:
+                            value = str(value)[:100] + "..."
+                        metadata[tag_name] = str(value)
+        except (AttributeError, KeyError, TypeError):
+            pass
+        
+        # PNG info
+        if hasattr(img, 'info') and img.info:
+            for key, value in img.info.items():
+                if key not in metadata:
+                    metadata[f"PNG_{key}"] = str(value)[:200]
+    
+    return metadata
+
+
+class MetadataSignals(QObject):
+    """Signals emitted by MetadataLoader"""
+    finished = Signal(int, str, dict)  # request id, file path, metadata
+    failed = Signal(int, str)  # request id, error message
+
+
+class MetadataLoader(QRunnable):
+    """Runnable that extracts file metadata off the GUI thread"""
+    
+    def __init__(self, request_id, file_path, extract):
+        super().__init__()
+        self.request_id = request_id
+        self.file_path = file_path
+        self.extract = extract
+        self.signals = MetadataSignals()
+    
+    def run(self):
+        """Extract metadata in a pool thread and report the result"""
+        try:
+            metadata = self.extract(self.file_path)
+        except Exception as e:
+            self.signals.failed.emit(self.request_id, str(e))
+            return
+        self.signals.finished.emit(self.request_id, self.file_path, metadata)
 
 
 class MainWindow(QMainWindow):
@@ -628,11 +735,21 @@ class MainWindow(QMainWindow):
         self.search_engine = SearchEngine()
         self.search_worker = None
         self.current_results = []
+        self._results_by_path = {}  # {file_path: [SearchMatch, ...]} for current_results
         self.current_directory = os.path.expanduser("~")
         self.current_search_pattern = ""
         self.current_file_matches = []
         self.current_match_index = 0
+        self._last_preview = None  # (file_path, match_count) of the rendered text preview
+        self._metadata_request_id = 0  # Incremented per preview to void stale metadata results
+        self._metadata_matches = []
+        self._metadata_loader = None
+        self._highlight_automaton = None  # Aho-Corasick automaton for literal highlighting
+        self._highlight_automaton_key = None
+        self._preview_plain_text = None  # toPlainText() of the preview, kept until the text is replaced
         self.search_history = []
+        self._history_set = set()  # Fast membership checks for search_history
+        self._history_dirty = False  # Unsaved history changes (save is deferred)
         self.history_file = os.path.join(os.path.expanduser("~"), ".advanced_search_history.json")
         self.preferences_file = os.path.join(os.path.expanduser("~"), ".advanced_search_preferences.json")
         self.custom_patterns_file = os.path.join(os.path.expanduser("~"), ".advanced_search_custom_patterns.json")
@@ -647,10 +764,12 @@ class MainWindow(QMainWindow):
         self.load_preferences()
         
         # Performance caches
-        self.file_cache = {}  # Cache file contents {path: (size, content_lines)}
+        self.file_cache = {}  # Cache file contents {path: (size, stripped_lines)}
         self.max_cache_size = self.preferences['max_cache_size']
         self.max_file_size = self.preferences['max_preview_file_size_mb'] * 1024 * 1024
         self.parsed_extensions = []  # Cached parsed extensions
+        self._metadata_cache = OrderedDict()  # LRU cache {(path, mtime, size): metadata}
+        self._max_metadata_cache_size = 128
         
         # Regex pattern options
         self.regex_patterns = {
@@ -765,6 +884,7 @@ class MainWindow(QMainWindow):
         self.results_tree.setToolTip("Click to preview, double-click to open file, right-click for options")
         self.results_tree.itemClicked.connect(self.on_tree_item_clicked)
         self.results_tree.itemDoubleClicked.connect(self.on_item_double_clicked)
+        self.results_tree.itemExpanded.connect(self.on_result_expanded)
         self.results_tree.setContextMenuPolicy(Qt.CustomContextMenu)
         self.results_tree.customContextMenuRequested.connect(self.show_context_menu)
         results_layout.addWidget(self.results_tree)
@@ -1156,7 +1276,6 @@ class MainWindow(QMainWindow):
         # Clean up when menu is hidden/closed
         def on_menu_hidden():
             # Use a timer to delay the flag reset to avoid immediate reopening
-            from PySide6.QtCore import QTimer
             QTimer.singleShot(200, lambda: setattr(self, 'regex_menu_open', False))
         
         self.regex_menu.aboutToHide.connect(on_menu_hidden)
@@ -1349,12 +1468,8 @@ class MainWindow(QMainWindow):
         if not self.current_results:
             return
         
-        # Group results by file
-        files_dict = {}
-        for match in self.current_results:
-            if match.file_path not in files_dict:
-                files_dict[match.file_path] = []
-            files_dict[match.file_path].append(match)
+        # Results are already grouped by file
+        files_dict = self._results_by_path
         
         # Apply sorting
         sort_option = self.sort_combo.currentText()
@@ -1368,36 +1483,40 @@ class MainWindow(QMainWindow):
         elif sort_option == "Match Count (Low-High)":
             sorted_files = sorted(files_dict.items(), key=lambda x: len(x[1]))
         elif sort_option == "File Size (Large-Small)":
-            sorted_files = sorted(files_dict.items(), 
-                                key=lambda x: os.path.getsize(x[0]) if os.path.exists(x[0]) else 0, 
-                                reverse=True)
+            sizes = {path: _safe_stat_value(path, 'st_size') for path in files_dict}
+            sorted_files = sorted(files_dict.items(), key=lambda x: sizes[x[0]], reverse=True)
         elif sort_option == "File Size (Small-Large)":
-            sorted_files = sorted(files_dict.items(), 
-                                key=lambda x: os.path.getsize(x[0]) if os.path.exists(x[0]) else 0)
+            sizes = {path: _safe_stat_value(path, 'st_size') for path in files_dict}
+            sorted_files = sorted(files_dict.items(), key=lambda x: sizes[x[0]])
         elif sort_option == "Date Modified (Newest)":
-            sorted_files = sorted(files_dict.items(), 
-                                key=lambda x: os.path.getmtime(x[0]) if os.path.exists(x[0]) else 0, 
-                                reverse=True)
+            mtimes = {path: _safe_stat_value(path, 'st_mtime') for path in files_dict}
+            sorted_files = sorted(files_dict.items(), key=lambda x: mtimes[x[0]], reverse=True)
         elif sort_option == "Date Modified (Oldest)":
-            sorted_files = sorted(files_dict.items(), 
-                                key=lambda x: os.path.getmtime(x[0]) if os.path.exists(x[0]) else 0)
+            mtimes = {path: _safe_stat_value(path, 'st_mtime') for path in files_dict}
+            sorted_files = sorted(files_dict.items(), key=lambda x: mtimes[x[0]])
         else:
             sorted_files = sorted(files_dict.items(), key=lambda x: x[0].lower())
         
-        # Update the results tree
+        # Update the results tree (batch updates for performance)
+        self.results_tree.setUpdatesEnabled(False)
+        sorting_enabled = self.results_tree.isSortingEnabled()
+        self.results_tree.setSortingEnabled(False)
         self.results_tree.clear()
         
+        file_items = []
         for file_path, matches in sorted_files:
-            file_item = QTreeWidgetItem(self.results_tree)
+            file_item = QTreeWidgetItem()
             file_item.setText(0, file_path)
             file_item.setText(1, str(len(matches)))
             file_item.setData(0, Qt.UserRole, matches)
-            
-            # Add match items
-            for match in matches:
-                match_item = QTreeWidgetItem(file_item)
-                match_item.setText(0, f"  Line {match.line_number}: {match.line_content[:80]}")
-                match_item.setData(0, Qt.UserRole, match)
+            # Add placeholder for lazy loading of match items
+            placeholder = QTreeWidgetItem(file_item)
+            placeholder.setText(0, "Loading...")
+            file_items.append(file_item)
+        
+        self.results_tree.addTopLevelItems(file_items)
+        self.results_tree.setSortingEnabled(sorting_enabled)
+        self.results_tree.setUpdatesEnabled(True)  # Re-enable updates
         
         # Update status
         total_matches = sum(len(matches) for _, matches in sorted_files)
@@ -1407,6 +1526,23 @@ class MainWindow(QMainWindow):
             f"Found {total_matches} matches in {total_files} files"
         )
     
+    def on_result_expanded(self, item):
+        """Handle result file expansion - lazy load match items"""
+        matches = item.data(0, Qt.UserRole)
+        if isinstance(matches, list):
+            # Check if we have a placeholder
+            if item.childCount() == 1 and item.child(0).text(0) == "Loading...":
+                # Remove placeholder
+                item.removeChild(item.child(0))
+                # Create actual match items
+                match_items = []
+                for match in matches:
+                    match_item = QTreeWidgetItem()
+                    match_item.setText(0, f"  Line {match.line_number}: {match.line_content[:80]}")
+                    match_item.setData(0, Qt.UserRole, match)
+                    match_items.append(match_item)
+                item.addChildren(match_items)
+    
     def toggle_search(self):
         """Toggle between starting and stopping search"""
         if self.is_searching:
@@ -1443,7 +1579,10 @@ class MainWindow(QMainWindow):
         # Clear previous results
         self.results_tree.clear()
         self.preview_text.clear()
+        self._preview_plain_text = None
+        self._last_preview = None
         self.current_results = []
+        self._results_by_path = {}
         
         # Update UI state
         self.is_searching = True
@@ -1469,6 +1608,11 @@ class MainWindow(QMainWindow):
         """Handle search completion"""
         self.current_results = results
         
+        # Group results by file for sorting and click lookups
+        self._results_by_path = {}
+        for result in results:
+            self._results_by_path.setdefault(result.file_path, []).append(result)
+        
         # Apply sorting to display results
         self.apply_sort()
         
@@ -1485,9 +1629,9 @@ class MainWindow(QMainWindow):
         if isinstance(data, SearchMatch):
             # Single match - show full file with all matches
             matches = [data]
-            # Try to find all matches for this file from results
-            for result in self.current_results:
-                if result.file_path == data.file_path and result != data:
+            # Add the other matches for this file from results
+            for result in self._results_by_path.get(data.file_path, []):
+                if result != data:
                     matches.append(result)
             self.show_file_contents_with_matches(matches)
         elif isinstance(data, list):
@@ -1512,9 +1656,21 @@ class MainWindow(QMainWindow):
             return
         
         file_path = matches[0].file_path
+        
+        # Same file already rendered: only the current match changes, skip re-reading and re-rendering
+        if self._last_preview == (file_path, len(matches)):
+            self.current_file_matches = matches
+            self.current_match_index = 0
+            self.update_match_navigation()
+            self.jump_to_current_match()
+            return
+        
         self.current_file_matches = matches
         self.current_match_index = 0
+        self._last_preview = None
+        self._metadata_request_id += 1  # Cancel any in-flight metadata preview
         self.preview_text.clear()
+        self._preview_plain_text = None
         
         try:
             # Check if this is an image file
@@ -1537,7 +1693,7 @@ class MainWindow(QMainWindow):
             # Check file size first
             file_size = os.path.getsize(file_path)
             if file_size > self.max_file_size:
-                self.preview_text.setPlainText(f"File too large to display ({file_size / 1024 / 1024:.1f}MB).\nMaximum size: {self.max_file_size / 1024 / 1024:.1f}MB")
+                self._set_preview_text(f"File too large to display ({file_size / 1024 / 1024:.1f}MB).\nMaximum size: {self.max_file_size / 1024 / 1024:.1f}MB")
                 self.current_file_matches = []
                 self.current_match_index = 0
                 self.update_match_navigation()
@@ -1551,13 +1707,11 @@ class MainWindow(QMainWindow):
                     pass
                 else:
                     # File changed, re-read
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        lines = f.readlines()
+                    lines = self._read_preview_lines(file_path)
                     self._cache_file(file_path, file_size, lines)
             else:
                 # Read entire file
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    lines = f.readlines()
+                lines = self._read_preview_lines(file_path)
                 self._cache_file(file_path, file_size, lines)
             
             # Build match line numbers set for quick lookup
@@ -1571,13 +1725,17 @@ class MainWindow(QMainWindow):
                 ""
             ]
             
-            # Show all lines (optimized loop)
-            display_lines.extend(
-                f"{'>>> ' if i in match_lines else '    '}{i:5d} | {line.rstrip()}"
+            # Show all lines (list comprehension lets join pre-size the result)
+            hit = '>>> '
+            miss = '    '
+            is_match_line = match_lines.__contains__
+            display_lines.extend([
+                f"{hit if is_match_line(i) else miss}{i:5d} | {line}"
                 for i, line in enumerate(lines, 1)
-            )
+            ])
             
-            self.preview_text.setPlainText("\n".join(display_lines))
+            self._set_preview_text("\n".join(display_lines))
+            self._last_preview = (file_path, len(matches))
             
             # Highlight all matches
             self.highlight_all_matches()
@@ -1588,89 +1746,59 @@ class MainWindow(QMainWindow):
                 self.jump_to_current_match()
                 
         except Exception as e:
-            self.preview_text.setPlainText(f"Error reading file: {str(e)}")
+            self._set_preview_text(f"Error reading file: {str(e)}")
             self.current_file_matches = []
             self.current_match_index = 0
             self.update_match_navigation()
     
     def _display_image_metadata_preview(self, file_path, matches):
-        """Display image metadata in preview pane"""
-        try:
-            from PIL import Image
-            from PIL.ExifTags import TAGS, GPSTAGS
-            import os
-            from datetime import datetime
-            
-            metadata = {}
-            
-            # Extract and display metadata
-            with Image.open(file_path) as img:
-                # File system info
-                stat_info = os.stat(file_path)
-                metadata['File_Size'] = f"{stat_info.st_size / 1024:.2f} KB"
-                metadata['File_Created'] = datetime.fromtimestamp(stat_info.st_ctime).strftime('%Y-%m-%d %H:%M:%S')
-                metadata['File_Modified'] = datetime.fromtimestamp(stat_info.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
-                
-                # Basic image info
-                metadata['Format'] = img.format or 'Unknown'
-                metadata['Mode'] = img.mode
-                metadata['Size'] = f"{img.width}x{img.height}"
-                
-                # Try to get EXIF data using getexif() (newer API)
-                try:
-                    exif = img.getexif()
-                    if exif:
-                        for tag_id, value in exif.items():
-                            tag_name = TAGS.get(tag_id, f"Tag_{tag_id}")
-                            
-                            # Handle GPS data specially
-                            if tag_name == "GPSInfo":
-                                try:
-                                    gps_data = {GPSTAGS.get(gps_tag_id, f"GPS_{gps_tag_id}"): str(value[gps_tag_id]) 
-                                               for gps_tag_id in value}
-                                    metadata['GPS_Info'] = str(gps_data)
-                                except Exception:
-                                    metadata['GPS_Info'] = str(value)
-                            else:
-                                # Convert value to string, handle bytes
-                                if isinstance(value, bytes):
-                                    try:
-                                        value = value.decode('utf-8', errors='ignore')
-                                    except Exception:
-                                        value = str(value)[:100]
-                                elif isinstance(value, (tuple, list)) and len(str(value)) > 100:
-                                    value = str(value)[:100] + "..."
-                                metadata[tag_name] = str(value)
-                except (AttributeError, KeyError, TypeError):
-                    pass
-                
-                # PNG info
-                if hasattr(img, 'info') and img.info:
-                    for key, value in img.info.items():
-                        if key not in metadata:
-                            metadata[f"PNG_{key}"] = str(value)[:200]
-            
-            # Display using common metadata display method
-            note = "This image has no EXIF metadata (typical for screenshots)" if len(metadata) <= 6 else None
-            self._display_metadata_common(file_path, matches, metadata, "Image Metadata", note)
-                
-        except Exception as e:
-            self.preview_text.setPlainText(f"Error reading image metadata: {str(e)}")
-            self.current_file_matches = []
-            self.current_match_index = 0
-            self.update_match_navigation()
+        """Display image metadata in preview pane (extracted in a background thread)"""
+        self._set_preview_text(f"Loading image metadata: {file_path}")
+        self._metadata_matches = matches
+        
+        loader = MetadataLoader(self._metadata_request_id, file_path, read_image_preview_metadata)
+        loader.signals.finished.connect(self._on_image_metadata_loaded)
+        loader.signals.failed.connect(self._on_image_metadata_failed)
+        self._metadata_loader = loader  # Keep a reference until it runs
+        QThreadPool.globalInstance().start(loader)
+    
+    def _on_image_metadata_loaded(self, request_id, file_path, metadata):
+        """Display image metadata once the background extraction finishes"""
+        # Ignore results for a preview that has since been replaced
+        if request_id != self._metadata_request_id:
+            return
+        
+        # Display using common metadata display method
+        note = "This image has no EXIF metadata (typical for screenshots)" if len(metadata) <= 6 else None
+        self._display_metadata_common(file_path, self._metadata_matches, metadata, "Image Metadata", note)
+    
+    def _on_image_metadata_failed(self, request_id, error):
+        """Handle a failed background image metadata extraction"""
+        if request_id != self._metadata_request_id:
+            return
+        
+        self._set_preview_text(f"Error reading image metadata: {error}")
+        self.current_file_matches = []
+        self.current_match_index = 0
+        self.update_match_navigation()
     
     def _display_file_metadata_preview(self, file_path, matches):
         """Display file metadata in preview pane (PDF, Office, audio, etc.)"""
         try:
-            import os
             from datetime import datetime
             
-            # Extract file metadata
-            metadata = self.search_engine._extract_file_metadata(file_path)
+            # Extract file metadata (cached while the file is unchanged)
+            stat_info = os.stat(file_path)
+            cache_key = (file_path, stat_info.st_mtime, stat_info.st_size)
+            if cache_key in self._metadata_cache:
+                self._metadata_cache.move_to_end(cache_key)
+            else:
+                self._metadata_cache[cache_key] = self.search_engine._extract_file_metadata(file_path)
+                if len(self._metadata_cache) > self._max_metadata_cache_size:
+                    self._metadata_cache.popitem(last=False)  # Evict least recently used
+            metadata = dict(self._metadata_cache[cache_key])
             
             # Add file system info
-            stat_info = os.stat(file_path)
             metadata['File_Size'] = f"{stat_info.st_size / 1024:.2f} KB"
             metadata['File_Created'] = datetime.fromtimestamp(stat_info.st_ctime).strftime('%Y-%m-%d %H:%M:%S')
             metadata['File_Modified'] = datetime.fromtimestamp(stat_info.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
@@ -1680,7 +1808,7 @@ class MainWindow(QMainWindow):
             self._display_metadata_common(file_path, matches, metadata, "File Metadata", note)
                 
         except Exception as e:
-            self.preview_text.setPlainText(f"Error reading file metadata: {str(e)}")
+            self._set_preview_text(f"Error reading file metadata: {str(e)}")
             self.current_file_matches = []
             self.current_match_index = 0
             self.update_match_navigation()
@@ -1707,7 +1835,7 @@ class MainWindow(QMainWindow):
             prefix = '>>> ' if line_num in match_lines else '    '
             display_lines.append(f"{prefix}{line_num:5d} | {line_text}")
         
-        self.preview_text.setPlainText("\n".join(display_lines))
+        self._set_preview_text("\n".join(display_lines))
         
         # Highlight all matches
         self.highlight_all_matches()
@@ -1717,6 +1845,26 @@ class MainWindow(QMainWindow):
         if matches:
             self.jump_to_current_match()
     
+    def _read_preview_lines(self, file_path):
+        """Read a file for preview as a list of lines with trailing whitespace already stripped"""
+        with open(file_path, 'rb') as f:
+            try:
+                # Decode straight from the OS page cache instead of copying into a bytes object first
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    text = str(mm, 'utf-8', 'ignore')
+            except ValueError:
+                # Empty files cannot be mapped
+                text = f.read().decode('utf-8', 'ignore')
+        
+        # Normalize line endings like text mode does
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        lines = text.split('\n')
+        # A trailing newline does not start another line
+        if lines[-1] == '':
+            lines.pop()
+        return [line.rstrip() for line in lines]
+    
     def _cache_file(self, file_path, file_size, lines):
         """Cache file contents with LRU eviction"""
         # If cache is full, remove oldest entry
@@ -1727,52 +1875,133 @@ class MainWindow(QMainWindow):
         
         self.file_cache[file_path] = (file_size, lines)
     
+    def _set_preview_text(self, text):
+        """Replace the preview text, dropping the cached plain-text copy"""
+        self.preview_text.setPlainText(text)
+        self._preview_plain_text = None
+    
+    def _get_preview_plain_text(self):
+        """The preview's plain text, copied out of the document once per displayed text"""
+        if self._preview_plain_text is None:
+            self._preview_plain_text = self.preview_text.toPlainText()
+        return self._preview_plain_text
+    
     def highlight_all_matches(self):
         """Highlight all search matches in the preview text (optimized)"""
         if not self.current_file_matches or not self.current_search_pattern:
             return
         
-        # Get the search pattern for highlighting
-        pattern = self.current_search_pattern
-        
-        # Build regex for highlighting
-        try:
-            if self.search_engine.use_regex:
-                flags = 0 if self.search_engine.case_sensitive else re.IGNORECASE
-                regex = re.compile(pattern, flags)
-            else:
-                escaped_pattern = re.escape(pattern)
-                if self.search_engine.whole_word:
-                    escaped_pattern = r'\b' + escaped_pattern + r'\b'
-                flags = 0 if self.search_engine.case_sensitive else re.IGNORECASE
-                regex = re.compile(escaped_pattern, flags)
-        except re.error:
-            return
-        
         # Yellow highlight format
         highlight_format = QTextCharFormat()
         highlight_format.setBackground(QColor(255, 255, 0))
         
-        # Get text once (optimization)
-        text = self.preview_text.toPlainText()
-        
         # Skip header (4 lines)
-        header_lines = text.split('\n', 4)
-        if len(header_lines) < 5:
+        doc = self.preview_text.document()
+        first_block = doc.findBlockByNumber(4)
+        if not first_block.isValid():
             return
-        header_length = sum(len(line) + 1 for line in header_lines[:4])
+        header_length = first_block.position()
         
         # Batch highlight all matches (optimized)
         cursor = self.preview_text.textCursor()
         cursor.beginEditBlock()  # Batch operations
         
-        for match in regex.finditer(text[header_length:]):
-            cursor.setPosition(header_length + match.start())
-            cursor.setPosition(header_length + match.end(), QTextCursor.KeepAnchor)
-            cursor.mergeCharFormat(highlight_format)
+        qregex = self._get_highlight_qregex()
+        if qregex is not None:
+            # Let Qt scan its own document instead of copying it out with toPlainText()
+            found = QTextCursor(doc)
+            found.setPosition(header_length)
+            while True:
+                found = doc.find(qregex, found)
+                if found.isNull():
+                    break
+                if found.hasSelection():
+                    found.mergeCharFormat(highlight_format)
+                elif not found.movePosition(QTextCursor.NextCharacter):
+                    # Empty match at end of document
+                    break
+        else:
+            # Regex searches use Python's re, so highlights agree with the search results
+            text = self._get_preview_plain_text()
+            for start, end in self._find_highlight_spans(text[header_length:]):
+                cursor.setPosition(header_length + start)
+                cursor.setPosition(header_length + end, QTextCursor.KeepAnchor)
+                cursor.mergeCharFormat(highlight_format)
         
         cursor.endEditBlock()  # Complete batch
     
+    def _get_highlight_qregex(self):
+        """
+        Build a QRegularExpression for highlighting a literal search
+        
+        Returns None for regex searches: Qt's PCRE2 reads some patterns ('[[:digit:]]',
+        'a{ 2}', 'a{,2}b') differently from Python's re, which found the matches.
+        """
+        if self.search_engine.use_regex:
+            return None
+        pattern = QRegularExpression.escape(self.current_search_pattern)
+        if self.search_engine.whole_word:
+            pattern = r'\b' + pattern + r'\b'
+        
+        # Unicode properties make \w, \b, etc. behave like Python's re
+        options = QRegularExpression.UseUnicodePropertiesOption
+        if not self.search_engine.case_sensitive:
+            options |= QRegularExpression.CaseInsensitiveOption
+        
+        qregex = QRegularExpression(pattern, options)
+        return qregex if qregex.isValid() else None
+    
+    def _get_highlight_regex(self):
+        """Build the regex used to highlight matches (None if the pattern is invalid)"""
+        pattern = self.current_search_pattern
+        try:
+            if self.search_engine.use_regex:
+                flags = 0 if self.search_engine.case_sensitive else re.IGNORECASE
+                return re.compile(pattern, flags)
+            escaped_pattern = re.escape(pattern)
+            if self.search_engine.whole_word:
+                escaped_pattern = r'\b' + escaped_pattern + r'\b'
+            flags = 0 if self.search_engine.case_sensitive else re.IGNORECASE
+            return re.compile(escaped_pattern, flags)
+        except re.error:
+            return None
+    
+    def _get_highlight_automaton(self):
+        """Get the Aho-Corasick automaton for the current literal pattern (built once per pattern)"""
+        case_sensitive = self.search_engine.case_sensitive
+        key = (self.current_search_pattern, case_sensitive)
+        if self._highlight_automaton_key != key:
+            needle = key[0] if case_sensitive else key[0].lower()
+            automaton = ahocorasick.Automaton()
+            automaton.add_word(needle, len(needle))
+            automaton.make_automaton()
+            self._highlight_automaton = automaton
+            self._highlight_automaton_key = key
+        return self._highlight_automaton
+    
+    def _find_highlight_spans(self, text):
+        """Find (start, end) spans of the current search pattern in text"""
+        engine = self.search_engine
+        # Literal searches use a C-level Aho-Corasick scan when available
+        if AHOCORASICK_AVAILABLE and not engine.use_regex and not engine.whole_word:
+            haystack = text if engine.case_sensitive else text.lower()
+            # lower() can change string length for a few characters; fall back to regex then
+            if len(haystack) == len(text):
+                spans = []
+                last_end = 0
+                for end_index, length in self._get_highlight_automaton().iter(haystack):
+                    start = end_index - length + 1
+                    # Skip overlapping occurrences, like re.finditer
+                    if start >= last_end:
+                        last_end = end_index + 1
+                        spans.append((start, last_end))
+                return spans
+        
+        regex = self._get_highlight_regex()
+        if regex is None:
+            return []
+        return [match.span() for match in regex.finditer(text)]
+    
     def jump_to_current_match(self):
         """Jump to the current match in preview"""
         if not self.current_file_matches or self.current_match_index >= len(self.current_file_matches):
@@ -1791,44 +2020,28 @@ class MainWindow(QMainWindow):
         header_pos = header_cursor.position()
         
         # Find all matches in the preview text (after header)
-        text = self.preview_text.toPlainText()
+        text = self._get_preview_plain_text()
         
-        # Build regex for finding matches
-        try:
-            pattern = self.current_search_pattern
-            if self.search_engine.use_regex:
-                flags = 0 if self.search_engine.case_sensitive else re.IGNORECASE
-                regex = re.compile(pattern, flags)
-            else:
-                escaped_pattern = re.escape(pattern)
-                if self.search_engine.whole_word:
-                    escaped_pattern = r'\b' + escaped_pattern + r'\b'
-                flags = 0 if self.search_engine.case_sensitive else re.IGNORECASE
-                regex = re.compile(escaped_pattern, flags)
+        # Find all matches after header only
+        all_matches = [span for span in self._find_highlight_spans(text) if span[0] >= header_pos]
+        
+        if self.current_match_index < len(all_matches):
+            match_start, match_end = all_matches[self.current_match_index]
             
-            # Find all matches after header only
-            all_matches = [m for m in regex.finditer(text) if m.start() >= header_pos]
+            # Create cursor and select the match
+            cursor = QTextCursor(self.preview_text.document())
+            cursor.setPosition(match_start)
+            cursor.setPosition(match_end, QTextCursor.KeepAnchor)
             
-            if self.current_match_index < len(all_matches):
-                match_obj = all_matches[self.current_match_index]
-                
-                # Create cursor and select the match
-                cursor = QTextCursor(self.preview_text.document())
-                cursor.setPosition(match_obj.start())
-                cursor.setPosition(match_obj.end(), QTextCursor.KeepAnchor)
-                
-                # Apply orange highlight to current match
-                current_format = QTextCharFormat()
-                current_format.setBackground(QColor(255, 165, 0))  # Orange
-                cursor.mergeCharFormat(current_format)
-                
-                # Move cursor to this position and ensure visible
-                cursor.setPosition(match_obj.start())
-                self.preview_text.setTextCursor(cursor)
-                self.preview_text.ensureCursorVisible()
-                
-        except re.error:
-            pass
+            # Apply orange highlight to current match
+            current_format = QTextCharFormat()
+            current_format.setBackground(QColor(255, 165, 0))  # Orange
+            cursor.mergeCharFormat(current_format)
+            
+            # Move cursor to this position and ensure visible
+            cursor.setPosition(match_start)
+            self.preview_text.setTextCursor(cursor)
+            self.preview_text.ensureCursorVisible()
     
     def update_match_navigation(self):
         """Update match counter and navigation button states"""
@@ -1978,20 +2191,30 @@ class MainWindow(QMainWindow):
     def load_search_history(self):
         """Load search history from file"""
         try:
-            if os.path.exists(self.history_file):
-                with open(self.history_file, 'r', encoding='utf-8') as f:
-                    self.search_history = json.load(f)
-                    # Limit to last 50 entries
-                    self.search_history = self.search_history[-50:]
+            if os.path.exists(self.history_file) and os.path.getsize(self.history_file) > 0:
+                if ORJSON_AVAILABLE:
+                    with open(self.history_file, 'rb') as f:
+                        self.search_history = orjson.loads(f.read())
+                else:
+                    with open(self.history_file, 'r', encoding='utf-8') as f:
+                        self.search_history = json.load(f)
+                # Limit to last 50 entries
+                self.search_history = self.search_history[-50:]
         except Exception as e:
             print(f"Failed to load search history: {e}")
             self.search_history = []
+        self._history_set = set(self.search_history)
     
     def save_search_history(self):
         """Save search history to file"""
         try:
-            with open(self.history_file, 'w', encoding='utf-8') as f:
-                json.dump(self.search_history, f, ensure_ascii=False, indent=2)
+            if ORJSON_AVAILABLE:
+                with open(self.history_file, 'wb') as f:
+                    f.write(orjson.dumps(self.search_history) + b'\n')
+            else:
+                with open(self.history_file, 'w', encoding='utf-8') as f:
+                    json.dump(self.search_history, f, ensure_ascii=False)
+                    f.write('\n')
         except Exception as e:
             print(f"Failed to save search history: {e}")
     
@@ -2000,9 +2223,15 @@ class MainWindow(QMainWindow):
         if not pattern or pattern.strip() == "":
             return
         
+        # Already the most recent entry - nothing changes
+        if self.search_history and self.search_history[-1] == pattern:
+            return
+        
         # Remove if already exists (to move to end)
-        if pattern in self.search_history:
+        if pattern in self._history_set:
             self.search_history.remove(pattern)
+        else:
+            self._history_set.add(pattern)
         
         # Add to end
         self.search_history.append(pattern)
@@ -2010,17 +2239,53 @@ class MainWindow(QMainWindow):
         # Limit to 50 entries
         if len(self.search_history) > 50:
             self.search_history = self.search_history[-50:]
-        
-        # Update dropdown and save
-        self.update_search_history_dropdown()
-        self.save_search_history()
+            self._history_set = set(self.search_history)
+        
+        # Move pattern to the top of the dropdown and schedule a save
+        self._move_to_top_of_history_dropdown(pattern)
+        self.schedule_search_history_save()
+    
+    def _move_to_top_of_history_dropdown(self, pattern):
+        """Move or insert pattern at the top of the dropdown without rebuilding it"""
+        self.search_input.blockSignals(True)
+        index = self.search_input.findText(pattern, Qt.MatchExactly | Qt.MatchCaseSensitive)
+        if index >= 0:
+            self.search_input.removeItem(index)
+        self.search_input.insertItem(0, pattern)
+        # Drop entries that fell out of the history
+        while self.search_input.count() > len(self.search_history):
+            self.search_input.removeItem(self.search_input.count() - 1)
+        self.search_input.setCurrentIndex(0)
+        self.search_input.blockSignals(False)
+    
+    def schedule_search_history_save(self):
+        """Save search history shortly, coalescing rapid successive searches into one write"""
+        if self._history_dirty:
+            return  # Save already scheduled
+        self._history_dirty = True
+        QTimer.singleShot(1000, self.flush_search_history)
+    
+    def flush_search_history(self):
+        """Write search history to disk if it has unsaved changes"""
+        if self._history_dirty:
+            self._history_dirty = False
+            self.save_search_history()
     
     def update_search_history_dropdown(self):
         """Update the search input dropdown with history"""
+        self.search_input.blockSignals(True)
         self.search_input.clear()
         # Add history in reverse order (most recent first)
         for pattern in reversed(self.search_history):
             self.search_input.addItem(pattern)
+        self.search_input.blockSignals(False)
+    
+    def closeEvent(self, event):
+        """Flush pending writes and stop the search workers before the window closes"""
+        self.flush_search_history()
+        self.search_engine.cancel()
+        self.search_engine.close()
+        super().closeEvent(event)
     
     def clear_search_history(self):
         """Clear all search history"""
@@ -2034,6 +2299,8 @@ class MainWindow(QMainWindow):
         
         if reply == QMessageBox.Yes:
             self.search_history = []
+            self._history_set.clear()
+            self._history_dirty = False
             self.update_search_history_dropdown()
             self.save_search_history()
             QMessageBox.information(self, "Success", "Search history has been cleared.")
@@ -2053,4 +2320,5 @@ def main():
 
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()
     main()
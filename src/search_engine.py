@@ -1,10 +1,33 @@
 """
 Search engine module for grep-style searching
 """
+import io
 import os
 import re
-from typing import List, Dict, Any
+import sys
+import time
+import logging
+import struct
+import ntpath
+import mmap
+import codecs
+import queue
+import threading
+import multiprocessing
+import concurrent.futures
+import urllib.parse
+from collections import OrderedDict, deque
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import accumulate
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from dataclasses import dataclass
+from datetime import datetime, timezone
+
+try:
+    from re import _parser as _sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse as _sre_parse
 
 try:
     from PIL import Image
@@ -32,7 +55,7 @@ except ImportError:
     OPENPYXL_AVAILABLE = False
 
 try:
-    from mutagen import File as MutagenFile
+    from mutagen import File as MutagenFile, MutagenError
     MUTAGEN_AVAILABLE = True
 except ImportError:
     MUTAGEN_AVAILABLE = False
@@ -67,17 +90,704 @@ try:
 except ImportError:
     SQLITE_AVAILABLE = False
 
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+try:
+    import pcre2
+    PCRE2_AVAILABLE = True
+except ImportError:
+    PCRE2_AVAILABLE = False
+
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
+try:
+    import re2
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
+
+
+logger = logging.getLogger(__name__)
+
+# Escapes whose meaning differs between per-line str patterns and a whole-file bytes scan
+_UNSCANNABLE_ESCAPE_RE = re.compile(r'\\[wWdDsSBxN0-7AZ]')
+# Escapes that match or assert the line terminator, which is CRLF in the mapped bytes
+_LINE_END_ESCAPE_RE = re.compile(r'\\[nr]')
+_ESCAPED_CHAR_RE = re.compile(r'\\.', re.DOTALL)
+_BOUNDARY_RE = re.compile(r'(?<!\\)(?:\\\\)*\\b')
+_WORD_CHAR_RE = re.compile(r'[A-Za-z0-9_]')
+# String anchors, negative lookarounds and conditionals behave differently inside joined text
+_EDGE_SENSITIVE_RE = re.compile(r'\\[AZ]|\(\?<?!|\(\?\(')
+_LONE_CR_RE = re.compile(rb'\r(?!\n)')
+_NON_ASCII_RE = re.compile(rb'[\x80-\xff]')
+# UTF-8 for the non-ASCII characters that case-fold to ASCII letters (İ ı ſ K)
+_ASCII_FOLD_RE = re.compile(rb'\xc4[\xb0\xb1]|\xc5\xbf|\xe2\x84\xaa')
+# Pattern letters that fold to those characters, and '-' for class ranges that may include them
+_FOLDING_LETTER_RE = re.compile(r'[iksIKS-]')
+_UTF8_CHECK_CHUNK = 1024 * 1024
+# Bytes copied out of a mapping at a time when counting newlines
+_NEWLINE_COUNT_CHUNK = 1024 * 1024
+# Readahead hints for mapped files (not available on Windows)
+_MADV_READAHEAD = getattr(mmap, 'MADV_SEQUENTIAL', None)
+_MADV_WILLNEED = getattr(mmap, 'MADV_WILLNEED', None)
+_READAHEAD_MIN_SIZE = 256 * 1024
+# Patterns made only of plain or escaped characters match as literal substrings
+_LITERAL_CHARS = r'(?:[^\\.^$*+?{}\[\]|()]|\\[^A-Za-z0-9])+'
+_LITERAL_PATTERN_RE = re.compile(_LITERAL_CHARS)
+_LITERAL_ALTERNATION_RE = re.compile(f'{_LITERAL_CHARS}(?:\\|{_LITERAL_CHARS})+')
+_LITERAL_ESCAPE_RE = re.compile(r'\\(.)')
+# Syntax other engines read differently from re: POSIX classes, and braces re takes
+# literally ('a{ 2}') or as a quantifier ('a{,2}') where they don't
+_POSIX_CLASS_RE = re.compile(r'\[([:.=]).*?\1\]')
+_STRICT_QUANTIFIER_RE = re.compile(r'\{\d+(?:,\d*)?\}')
+# Quantified groups, where re's backtracking is slow on large files
+_BACKTRACKING_RE = re.compile(r'\)[*+?{]')
+
+
+class _RegexBackend:
+    """Regex engine used for the whole-file candidate scan (Python's re)"""
+    name = 're'
+    
+    def compile(self, pattern: bytes, flags: int):
+        """Compile a bytes pattern; flags are re module flags"""
+        return re.compile(pattern, flags)
+    
+    def spans(self, compiled, mm: mmap.mmap) -> Iterator[Tuple[int, int]]:
+        """Yield byte spans of all matches in a mapped file"""
+        for match in compiled.finditer(mm):
+            yield match.span()
+
+
+class _AutoBackend(_RegexBackend):
+    """Python's re, handing patterns that backtrack heavily to PCRE2 when it is installed"""
+    name = 'auto'
+
+
+class _Pcre2Backend(_RegexBackend):
+    """Candidate scan with PCRE2's JIT compiler, falling back to re for syntax PCRE2 rejects"""
+    name = 'pcre2'
+    # pcre2 copies the subject, even from a memoryview, so larger files are scanned with re
+    MAX_SCAN_SIZE = 8 * 1024 * 1024
+    
+    def compile(self, pattern: bytes, flags: int):
+        pcre2_flags = 0
+        if flags & re.IGNORECASE:
+            pcre2_flags |= pcre2.IGNORECASE
+        if flags & re.MULTILINE:
+            pcre2_flags |= pcre2.MULTILINE
+        fallback = super().compile(pattern, flags)
+        try:
+            return pcre2.compile(pattern, pcre2_flags, jit=True), fallback
+        except Exception:
+            return fallback
+    
+    def spans(self, compiled, mm: mmap.mmap) -> Iterator[Tuple[int, int]]:
+        if isinstance(compiled, re.Pattern):
+            yield from super().spans(compiled, mm)
+            return
+        compiled, fallback = compiled
+        if len(mm) > self.MAX_SCAN_SIZE:
+            yield from super().spans(fallback, mm)
+            return
+        # pcre2 doesn't accept an mmap, so scan a copy of the mapping
+        for match in compiled.finditer(mm[:]):
+            yield match.span()
+
+
+class _HyperscanBackend(_RegexBackend):
+    """
+    Candidate scan with Hyperscan's automata, falling back to re for syntax Hyperscan rejects
+    
+    Hyperscan reports the end of every match, in order. Lines are verified one at a time,
+    so the end is enough to find them: spans are the byte before it, plus the byte after
+    when that one is a newline (the match may be empty and start the next line), and only
+    ends past the lines already covered are kept. The scan stops after SPAN_BATCH of them
+    and resumes at the next line once they are consumed.
+    """
+    name = 'hyperscan'
+    # Candidate spans gathered per scan, which bounds memory and work past an early exit
+    SPAN_BATCH = 256
+    
+    def compile(self, pattern: bytes, flags: int):
+        # No HS_FLAG_SOM_LEFTMOST: start offsets aren't needed, cost extra, and crash some
+        # Hyperscan builds on dense matches of unbounded repeats
+        hs_flags = 0
+        if flags & re.IGNORECASE:
+            hs_flags |= hyperscan.HS_FLAG_CASELESS
+        if flags & re.MULTILINE:
+            hs_flags |= hyperscan.HS_FLAG_MULTILINE
+        database = hyperscan.Database()
+        try:
+            database.compile(expressions=[pattern], ids=[0], elements=1, flags=[hs_flags])
+        except hyperscan.error:
+            # Lookarounds, backreferences and patterns that match the empty string
+            return super().compile(pattern, flags)
+        # Scratch space can't be shared by threads scanning at the same time
+        return database, threading.local()
+    
+    def spans(self, compiled, mm: mmap.mmap) -> Iterator[Tuple[int, int]]:
+        if isinstance(compiled, re.Pattern):
+            yield from super().spans(compiled, mm)
+            return
+        database, local = compiled
+        scratch = getattr(local, 'scratch', None)
+        if scratch is None:
+            scratch = local.scratch = hyperscan.Scratch(database)
+        size = len(mm)
+        pos = 0  # Line start the next scan begins at
+        while pos < size:
+            batch = []
+            covered = pos  # Lines before this offset are searched for the spans in batch
+            
+            def on_match(_id, _start, end, _flags, _context):
+                nonlocal covered
+                end += pos
+                if end < covered:
+                    # Ends within lines an earlier span already covers
+                    return False
+                if end and mm[end - 1] != 0x0A:
+                    batch.append((end - 1, end))
+                else:
+                    batch.append((max(end - 1, 0), min(end + 1, size)))
+                newline = mm.find(b'\n', end)
+                covered = newline + 1 if newline >= 0 else size + 1
+                # Non-zero stops the scan
+                return len(batch) >= self.SPAN_BATCH
+            
+            try:
+                if pos:
+                    with memoryview(mm) as view, view[pos:] as rest:
+                        database.scan(rest, match_event_handler=on_match, scratch=scratch)
+                else:
+                    database.scan(mm, match_event_handler=on_match, scratch=scratch)
+            except hyperscan.ScanTerminated:
+                pass
+            yield from batch
+            if len(batch) < self.SPAN_BATCH:
+                return
+            pos = covered
+
+
+class _Re2Backend(_RegexBackend):
+    """Candidate scan with RE2's linear-time automata, falling back to re for syntax RE2 lacks"""
+    name = 're2'
+    
+    def compile(self, pattern: bytes, flags: int):
+        options = re2.Options()
+        options.encoding = re2.Options.Encoding.LATIN1  # One character per byte, as in re
+        options.case_sensitive = not flags & re.IGNORECASE
+        options.log_errors = False
+        try:
+            return re2.compile(b'(?m)' + pattern if flags & re.MULTILINE else pattern, options)
+        except Exception:
+            # Backreferences, lookarounds and the like
+            return super().compile(pattern, flags)
+
+
+# Candidate scan engines by name, for those that can be imported
+_REGEX_BACKENDS = {'re': _RegexBackend(), 'auto': _AutoBackend()}
+if PCRE2_AVAILABLE:
+    _REGEX_BACKENDS['pcre2'] = _Pcre2Backend()
+if RE2_AVAILABLE:
+    _REGEX_BACKENDS['re2'] = _Re2Backend()
+if HYPERSCAN_AVAILABLE:
+    _REGEX_BACKENDS['hyperscan'] = _HyperscanBackend()
+
+
+def _select_regex_backend() -> _RegexBackend:
+    """Pick the candidate scan engine from SEARCH_REGEX_BACKEND ('auto', 're', 'pcre2', 're2' or 'hyperscan')"""
+    choice = os.environ.get('SEARCH_REGEX_BACKEND', 'auto').lower()
+    return _REGEX_BACKENDS.get(choice, _REGEX_BACKENDS['re'])
+
+
+def _plan_backend(pattern: str, backend: _RegexBackend) -> _RegexBackend:
+    """
+    Resolve the engine that scans for one pattern
+    
+    PCRE2, RE2 and Hyperscan compile some patterns without error but read them differently
+    from re: '[[:digit:]]' as a POSIX class, and braces re takes literally ('a{ 2}') or as
+    a quantifier ('a{,2}'). Those patterns keep re, so no engine misses a line re matches.
+    """
+    if backend.name == 're':
+        return backend
+    unescaped = _ESCAPED_CHAR_RE.sub('', pattern)
+    if _POSIX_CLASS_RE.search(unescaped) or '{' in _STRICT_QUANTIFIER_RE.sub('', unescaped):
+        return _REGEX_BACKENDS['re']
+    if backend.name == 'auto':
+        # PCRE2 scans a copy of the file, which only pays off when re would backtrack
+        # through a quantified group
+        if 'pcre2' in _REGEX_BACKENDS and _BACKTRACKING_RE.search(unescaped):
+            return _REGEX_BACKENDS['pcre2']
+        return _REGEX_BACKENDS['re']
+    return backend
+
+
+# Candidate lines are always verified with Python's re, so the backend only affects speed
+_SCAN_BACKEND = _select_regex_backend()
+
+
+@dataclass
+class _ByteScanPlan:
+    """Bytes regex for finding candidate lines, and the file content it is valid for"""
+    regex: Any  # Compiled by backend
+    backend: _RegexBackend  # Engine that scans with regex
+    crlf_safe: bool  # Pattern never touches the line terminator
+    ascii_text_only: bool  # Pattern has '.', negated classes or \b next to punctuation, which differ on non-ASCII text
+    fold_sensitive: bool  # IGNORECASE, where a few non-ASCII characters fold to ASCII
+
+
+@lru_cache(maxsize=64)
+def _byte_scan_plan(pattern: str, flags: int, backend: _RegexBackend = _SCAN_BACKEND) -> Optional[_ByteScanPlan]:
+    """
+    Build a bytes regex that finds every line a str pattern could match
+    
+    Returns None when the pattern cannot be scanned as bytes
+    (non-ASCII text or Unicode-dependent escapes).
+    """
+    if not pattern.isascii() or _UNSCANNABLE_ESCAPE_RE.search(pattern):
+        return None
+    try:
+        # Compile with re first so invalid patterns are rejected the same way for every backend
+        _compile_bytes(pattern.encode('ascii'), re.MULTILINE | (flags & re.IGNORECASE))
+        backend = _plan_backend(pattern, backend)
+        regex = backend.compile(pattern.encode('ascii'), re.MULTILINE | (flags & re.IGNORECASE))
+    except re.error:
+        return None
+    
+    unescaped = _ESCAPED_CHAR_RE.sub('', pattern)
+    negated = '[^' in unescaped
+    # \b is only equivalent in bytes when it sits next to an ASCII word character
+    loose_boundary = any(
+        not (_WORD_CHAR_RE.match(pattern, m.end()) or
+             (m.end() > 2 and _WORD_CHAR_RE.match(pattern, m.end() - 3)
+              and not pattern.startswith('\\', m.end() - 4)))
+        for m in _BOUNDARY_RE.finditer(pattern)
+    )
+    crlf_safe = not (flags & re.DOTALL or negated or '$' in unescaped or '(?' in unescaped
+                     or _LINE_END_ESCAPE_RE.search(pattern))
+    return _ByteScanPlan(
+        regex=regex,
+        backend=backend,
+        crlf_safe=crlf_safe,
+        ascii_text_only=negated or loose_boundary or '.' in unescaped,
+        fold_sensitive=bool(flags & re.IGNORECASE)
+    )
+
+
+def _plan_fits(plan: _ByteScanPlan, mm: mmap.mmap) -> bool:
+    """Check whether a byte scan finds the same lines as text-mode reading of this file"""
+    if mm.find(b'\r') >= 0:
+        # Lone CR line endings need text-mode line splitting
+        if not plan.crlf_safe or _LONE_CR_RE.search(mm):
+            return False
+    if _NON_ASCII_RE.search(mm) is None:
+        return True
+    if plan.ascii_text_only:
+        return False
+    if plan.fold_sensitive and _ASCII_FOLD_RE.search(mm):
+        return False
+    # Invalid bytes are dropped when decoding, which shifts what the pattern sees
+    return _is_valid_utf8(mm)
+
+
+def _is_valid_utf8(mm: mmap.mmap) -> bool:
+    """Validate a mapped file as UTF-8 without decoding it all at once"""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    try:
+        for pos in range(0, len(mm), _UTF8_CHECK_CHUNK):
+            decoder.decode(mm[pos:pos + _UTF8_CHECK_CHUNK])
+        decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def _count_newlines(mm: mmap.mmap, start: int, end: int) -> int:
+    """Count newlines in mm[start:end] without copying the whole range at once"""
+    if end - start <= _NEWLINE_COUNT_CHUNK:
+        return mm[start:end].count(b'\n')
+    return sum(mm[pos:min(pos + _NEWLINE_COUNT_CHUNK, end)].count(b'\n')
+               for pos in range(start, end, _NEWLINE_COUNT_CHUNK))
+
+
+def _advise_readahead(mm: mmap.mmap):
+    """Ask the kernel to read a large mapped file ahead of the scan"""
+    if _MADV_READAHEAD is None or len(mm) < _READAHEAD_MIN_SIZE:
+        return
+    try:
+        mm.madvise(_MADV_READAHEAD)
+        if _MADV_WILLNEED is not None:
+            mm.madvise(_MADV_WILLNEED)
+    except OSError:
+        pass
+
+
+def _literal_alternatives(pattern: str) -> Optional[Tuple[str, ...]]:
+    """Split a pattern like 'foo|bar|baz' into its literals, or None if it is not a literal union"""
+    if not _LITERAL_ALTERNATION_RE.fullmatch(pattern):
+        return None
+    return tuple(_LITERAL_ESCAPE_RE.sub(r'\1', part) for part in _LITERAL_PATTERN_RE.findall(pattern))
+
+
+@lru_cache(maxsize=16)
+def _literal_automaton(pattern: str, flags: int):
+    """Build an Aho-Corasick automaton for an ASCII literal-alternation pattern, or None"""
+    if not AHOCORASICK_AVAILABLE:
+        return None
+    literals = _literal_alternatives(pattern)
+    if literals is None or not all(literal.isascii() for literal in literals):
+        return None
+    automaton = ahocorasick.Automaton()
+    for literal in literals:
+        if flags & re.IGNORECASE:
+            literal = literal.lower()
+        automaton.add_word(literal, len(literal))
+    automaton.make_automaton()
+    return automaton
+
+
+def _automaton_spans(automaton, mm: mmap.mmap, ignore_case: bool) -> Iterator[Tuple[int, int]]:
+    """Yield byte spans of automaton hits in a mapped file"""
+    # Latin-1 maps each byte to one character, so string offsets are byte offsets
+    text = str(mm, 'latin-1')
+    if ignore_case:
+        text = text.lower()
+    for end_index, length in automaton.iter(text):
+        yield end_index - length + 1, end_index + 1
+
+
+def _literal_spans(needle: bytes, mm: mmap.mmap) -> Iterator[Tuple[int, int]]:
+    """Yield byte spans of a literal in a mapped file, at most one per line"""
+    length = len(needle)
+    pos = mm.find(needle)
+    while pos >= 0:
+        yield pos, pos + length
+        # The whole line is verified by the caller, so resume on the next line
+        line_end = mm.find(b'\n', pos + length) if b'\n' not in needle else pos
+        if line_end < 0:
+            return
+        pos = mm.find(needle, line_end + 1)
+
+
+@lru_cache(maxsize=64)
+def _joined_candidate_regex(pattern: str, flags: int) -> Optional[re.Pattern]:
+    """
+    Build a MULTILINE regex that finds every line a pattern could match when
+    the lines are joined with newlines, or None if joining changes its meaning
+    """
+    if _EDGE_SENSITIVE_RE.search(pattern):
+        return None
+    try:
+        return re.compile(pattern, flags | re.MULTILINE)
+    except re.error:
+        return None
+
+
+def _candidate_lines(candidate_regex: re.Pattern, text: str) -> List[Tuple[int, int, int]]:
+    """
+    (index, start, end) of each line of text.split('\\n') touched by a candidate match, in order
+    
+    Lines are located by offset, so text is never split into a list of all its lines.
+    """
+    touched = []
+    length = len(text)
+    line = 0  # Index of the line starting at line_start
+    line_start = 0  # Start of the first line not yet reported
+    for candidate in candidate_regex.finditer(text):
+        start = candidate.start()
+        last = max(candidate.end() - 1, start)
+        if last < line_start:
+            # Another match on a line already reported
+            continue
+        if start > line_start:
+            # Matches never overlap, so newlines are counted in one forward pass
+            skipped = text.count('\n', line_start, start)
+            if skipped:
+                line += skipped
+                line_start = text.rfind('\n', 0, start) + 1
+        while True:
+            end = text.find('\n', line_start)
+            if end < 0:
+                end = length
+            touched.append((line, line_start, end))
+            line += 1
+            line_start = end + 1
+            if end >= last:
+                break
+    return touched
+
+
+def _surrounding_lines(text: str, start: int, end: int, count: int) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """Up to count lines of text before and after the line text[start:end], without trailing CRs"""
+    before = []
+    pos = start
+    while pos > 0 and len(before) < count:
+        prev = text.rfind('\n', 0, pos - 1) + 1
+        before.append(text[prev:pos - 1].rstrip('\r'))
+        pos = prev
+    before.reverse()
+    after = []
+    pos = end
+    while pos < len(text) and len(after) < count:
+        nxt = text.find('\n', pos + 1)
+        if nxt < 0:
+            nxt = len(text)
+        after.append(text[pos + 1:nxt].rstrip('\r'))
+        pos = nxt
+    return tuple(before), tuple(after)
+
+
+def _regex_literal(pattern: str) -> Optional[str]:
+    """The text a regex without metacharacters matches literally, or None"""
+    if not _LITERAL_PATTERN_RE.fullmatch(pattern):
+        return None
+    return _LITERAL_ESCAPE_RE.sub(r'\1', pattern)
+
+
+@lru_cache(maxsize=64)
+def _required_literal(pattern: str, flags: int) -> Optional[str]:
+    """
+    Longest run of literal text every match of a case-sensitive pattern contains, or None
+    
+    A string without it cannot match, so a substring test can skip the regex.
+    """
+    if flags & re.IGNORECASE:
+        return None
+    try:
+        parsed = _sre_parse.parse(pattern, flags)
+        if parsed.state.flags & re.IGNORECASE:
+            return None
+    except Exception:
+        return None
+    best = ''
+    run = []
+    # Only top-level literals are required; groups, classes and repeats end a run
+    for op, arg in parsed:
+        if op == _sre_parse.LITERAL:
+            run.append(chr(arg))
+        else:
+            if len(run) > len(best):
+                best = ''.join(run)
+            run = []
+    if len(run) > len(best):
+        best = ''.join(run)
+    return best or None
+
+
+@lru_cache(maxsize=64)
+def _compile_bytes(pattern: bytes, flags: int) -> re.Pattern:
+    """Compile a bytes pattern, reusing the result across searches"""
+    return re.compile(pattern, flags)
+
+
+def _binary_regex(pattern: str, flags: int) -> Optional[re.Pattern]:
+    """
+    Compile an ASCII str pattern to match raw bytes, or None if it only makes sense on text
+    
+    Patterns whose meaning depends on Unicode (\\w, \\d, \\s, \\b, '.', negated classes, or
+    IGNORECASE on letters with non-ASCII case variants) stay on the decoded text.
+    """
+    if not pattern.isascii() or _UNSCANNABLE_ESCAPE_RE.search(pattern) or _BOUNDARY_RE.search(pattern):
+        return None
+    unescaped = _ESCAPED_CHAR_RE.sub('', pattern)
+    if '.' in unescaped or '[^' in unescaped:
+        return None
+    if flags & re.IGNORECASE and _FOLDING_LETTER_RE.search(unescaped):
+        return None
+    try:
+        return _compile_bytes(pattern.encode('ascii'), flags & ~re.UNICODE)
+    except re.error:
+        return None
+
+
+def _decoded_spans(mm: mmap.mmap, regex: re.Pattern, chunk_size: int, overlap: int,
+                   required: Optional[str] = None) -> Iterator[Tuple[int, int]]:
+    """
+    Spans of regex matches in the UTF-8 text of a mapping, as offsets into that text
+    
+    Undecodable bytes are dropped, as with decode(errors='ignore'). The mapping is
+    decoded chunk_size bytes at a time and a match is only reported once overlap
+    characters follow it (or the text has ended), so matches shorter than overlap
+    are found exactly as in the whole text while only a window of it is held.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+    size = len(mm)
+    text = ''
+    base = 0  # Offset of text[0] in the whole text
+    pos = 0  # Where the next search starts in text
+    last = None  # Span of the last match reported, relative to text
+    for offset in range(0, size, chunk_size):
+        final = offset + chunk_size >= size
+        text += decoder.decode(mm[offset:offset + chunk_size], final)
+        limit = len(text) if final else len(text) - overlap
+        if required is not None and text.find(required, pos) < 0:
+            # Any match starting before limit would end inside text and contain required
+            pos = max(pos, limit)
+            continue
+        for match in regex.finditer(text, pos):
+            span = match.span()
+            if span[1] > limit and not final:
+                # Search again from here once more text follows it
+                pos = span[0]
+                break
+            if span != last:
+                last = span
+                yield base + span[0], base + span[1]
+        else:
+            pos = max(limit, last[1] if last is not None else 0)
+        # Keep room behind pos for lookbehinds
+        cut = pos - overlap
+        if cut > 0:
+            text = text[cut:]
+            base += cut
+            pos -= cut
+            if last is not None:
+                last = (last[0] - cut, last[1] - cut)
+
+
+@lru_cache(maxsize=1)
+def _inflatable_zip_methods() -> frozenset:
+    """Compression methods zipfile can decompress with the modules this interpreter has"""
+    methods = {zipfile.ZIP_STORED}
+    for method, module in ((zipfile.ZIP_DEFLATED, 'zlib'), (zipfile.ZIP_BZIP2, 'bz2'), (zipfile.ZIP_LZMA, 'lzma')):
+        try:
+            __import__(module)
+        except ImportError:
+            continue
+        methods.add(method)
+    return frozenset(methods)
+
+
+def _decompressor_errors() -> Tuple[type, ...]:
+    """Exception types of the decompression modules this interpreter has (bz2 raises OSError)"""
+    errors = []
+    for module, name in (('zlib', 'error'), ('lzma', 'LZMAError')):
+        try:
+            errors.append(getattr(__import__(module), name))
+        except ImportError:
+            continue
+    return tuple(errors)
+
+
+# What reading a damaged or unsupported archive raises: zipfile's own errors, NotImplementedError
+# for unknown versions and features, the decompressors' errors, and IndexError, struct.error,
+# EOFError or ValueError from truncated records
+_ARCHIVE_ERRORS = (OSError, EOFError, ValueError, IndexError, NotImplementedError,
+                   struct.error) + _decompressor_errors()
+if ZIPFILE_AVAILABLE:
+    _ARCHIVE_ERRORS += (zipfile.BadZipFile, zipfile.LargeZipFile)
+
+# What the metadata parsers raise for malformed files: the standard lookup, type and value errors
+# they surface from bad structures, and each library's own base error
+_METADATA_ERRORS = _ARCHIVE_ERRORS + (LookupError, TypeError, AttributeError, ArithmeticError,
+                                      RuntimeError, AssertionError, SyntaxError)
+if PYPDF2_AVAILABLE:
+    _METADATA_ERRORS += (PyPDF2.errors.PyPdfError,)
+if DOCX_AVAILABLE:
+    _METADATA_ERRORS += (docx.opc.exceptions.OpcError,)
+if OPENPYXL_AVAILABLE:
+    _METADATA_ERRORS += (openpyxl.utils.exceptions.InvalidFileException,)
+if MUTAGEN_AVAILABLE:
+    _METADATA_ERRORS += (MutagenError,)
+if SQLITE_AVAILABLE:
+    _METADATA_ERRORS += (sqlite3.Error,)
+
+
+def _split_stream(stream: Iterator[str]) -> Iterator[str]:
+    """Yield the lines of a stream opened with newline='\\n' exactly as str.split('\\n') would"""
+    line = ''
+    for line in stream:
+        yield line[:-1] if line.endswith('\n') else line
+    if not line or line.endswith('\n'):
+        # Text that is empty or ends with a newline has an empty last line
+        yield ''
+
+
+def _decode_line(mm: mmap.mmap, start: int, end: int) -> str:
+    """Decode a line from a mapped file, dropping a CR before the line feed"""
+    if end > start and mm[end - 1] == 0x0D:
+        end -= 1
+    return mm[start:end].decode('utf-8', errors='ignore')
+
+
+def _decode_lines(mm: mmap.mmap, start: int, end: int) -> Tuple[str, ...]:
+    """Decode consecutive lines from a mapped file; end is the offset of the last line's terminator"""
+    text = mm[start:end].decode('utf-8', errors='ignore')
+    if '\r' in text:
+        # Files with lone CRs never get here, so every CR is part of a CRLF
+        text = text.replace('\r\n', '\n')
+        if text.endswith('\r'):
+            text = text[:-1]
+    return tuple(text.split('\n'))
+
+
+def _read_core_properties(z: 'zipfile.ZipFile') -> Optional[Dict[str, str]]:
+    """Read an Office Open XML package's docProps/core.xml as {local tag name: text}, or None if absent"""
+    try:
+        data = z.read('docProps/core.xml')
+    except KeyError:
+        return None
+    props = {}
+    for elem in ET.fromstring(data):
+        if elem.text and elem.text.strip():
+            props[elem.tag.rsplit('}', 1)[-1]] = elem.text
+    return props
+
+
+def _format_w3cdtf(text: str, naive: bool = False) -> str:
+    """Format a docProps timestamp the way str() shows the datetime the Office libraries return"""
+    value = text.strip()
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    try:
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        return text.strip()
+    if naive:
+        return str(dt.replace(tzinfo=None))
+    if dt.tzinfo is None:
+        return str(dt.replace(tzinfo=timezone.utc))
+    return str(dt.astimezone(timezone.utc))
+
+
+class _PatternSet:
+    """Several regexes searched one after another, for patterns that can't share one alternation"""
+    
+    def __init__(self, patterns: List[str]):
+        self._regexes = [re.compile(p) for p in patterns]
+    
+    def search(self, text: str) -> Optional[re.Match]:
+        """Return the first pattern's match in text, like re.Pattern.search"""
+        for regex in self._regexes:
+            match = regex.search(text)
+            if match is not None:
+                return match
+        return None
+
 
 @dataclass
 class SearchMatch:
     """Represents a search match in a file"""
+    # One instance per hit, so skip the per-instance __dict__ (fields have no defaults)
+    __slots__ = ('file_path', 'line_number', 'line_content', 'match_start', 'match_end',
+                 'context_before', 'context_after')
+    
     file_path: str
     line_number: int
     line_content: str
     match_start: int
     match_end: int
-    context_before: List[str]
-    context_after: List[str]
+    # Built once per matched line and shared by every match on it; () when context_lines is 0
+    context_before: Tuple[str, ...]
+    context_after: Tuple[str, ...]
 
 
 class SearchEngine:
@@ -106,6 +816,51 @@ class SearchEngine:
     
     ARCHIVE_EXTENSIONS = {'.zip', '.epub'}
     
+    # Metadata formats parsed by CPU-heavy pure-Python libraries, extracted in a process pool
+    # (.docx and .xlsx properties are a single small XML read, cheaper than the IPC)
+    PROCESS_METADATA_EXTENSIONS = {'.pdf'}
+    # ProcessPoolExecutor on Windows accepts at most 61 workers
+    MAX_PROCESS_WORKERS = 61
+    
+    # How text search treats binary files: 'skip' files with NUL bytes near the start,
+    # 'auto' also skips mostly non-UTF-8 content, 'text' searches everything as text
+    BINARY_MODES = ('skip', 'auto', 'text')
+    BINARY_PROBE_SIZE = 8192
+    
+    # Binary files searched as decoded text are decoded this many bytes at a time,
+    # keeping this many characters of the previous chunk for matches across the boundary
+    BINARY_SCAN_CHUNK = 1024 * 1024
+    BINARY_SCAN_OVERLAP = 512 * 1024
+    
+    # Files the directory walker may list ahead of the search threads
+    WALK_PREFETCH = 4096
+    
+    # Archive members above this size are searched line by line instead of decoded whole
+    ARCHIVE_STREAM_SIZE = 4 * 1024 * 1024
+    # Archives holding more text than this have their members searched on a shared thread
+    # pool (zlib inflates without the GIL), with at most two members per worker in flight
+    ARCHIVE_PARALLEL_SIZE = 4 * 1024 * 1024
+    ARCHIVE_WORKERS = min(8, os.cpu_count() or 4)
+    
+    # Most rows counted per SQLite table; larger tables are reported as "N+"
+    SQLITE_COUNT_LIMIT = 1000000
+    
+    # RTF header fields, format: {\rtf1{\info{\title ...}{\author ...}}}
+    _RTF_TITLE_RE = re.compile(r'\\title\s+([^}]+)')
+    _RTF_AUTHOR_RE = re.compile(r'\\author\s+([^}]+)')
+    _RTF_SUBJECT_RE = re.compile(r'\\subject\s+([^}]+)')
+    _RTF_VERSION_RE = re.compile(r'\\rtf(\d+)')
+    
+    # Namespace map for EPUB package metadata
+    _DUBLIN_CORE_NS = {'dc': 'http://purl.org/dc/elements/1.1/'}
+    
+    # Share roots remembered by the network accessibility cache
+    NETWORK_CACHE_SIZE = 1024
+    
+    # Threads probing network shares, shared by all engines and created on first use
+    _probe_pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+    _probe_pool_lock = threading.Lock()
+    
     def __init__(self):
         self.case_sensitive = False
         self.use_regex = False
@@ -114,16 +869,39 @@ class SearchEngine:
         self.search_file_metadata = False  # File metadata (PDF, Office, audio, video)
         self.search_in_archives = False  # Search inside archive files
         self.hex_search = False  # Binary/hex search mode
+        self.binary_mode = 'skip'  # One of BINARY_MODES
         self.context_lines = 2
         self.file_extensions = []  # Empty means all files
+        self._ext_tuple = ()  # file_extensions as a tuple for str.endswith
         self.max_results = 0  # 0 = unlimited
         self.max_search_file_size = 50 * 1024 * 1024  # 50MB default
+        self.max_workers = min(32, (os.cpu_count() or 4) * 2)  # Threads for parallel file search
+        self._thread_pool = None  # Reused across searches, created on first directory search
+        self._thread_pool_workers = 0
+        self._cancel_event = threading.Event()  # Set to stop a running search early
+        self._process_pool = None  # Created on first heavy metadata extraction
+        self._process_pool_lock = threading.Lock()
+        self._archive_pool = None  # Created on first large archive
+        self._archive_pool_lock = threading.Lock()
         self.network_timeout = 5  # seconds for network operations
-        self._network_path_cache = {}  # Cache for network path accessibility
+        self.network_cache_ttl = 60  # seconds an accessibility result is reused
+        self.network_failure_ttl = 5  # seconds before an unreachable share is probed again
+        # Share root -> (accessible, expiry on the monotonic clock), least recently used first
+        self._network_path_cache: 'OrderedDict[str, Tuple[bool, float]]' = OrderedDict()
         self.exclude_patterns = [
             r'\.git', r'\.svn', r'__pycache__', r'node_modules',
             r'\.pyc$', r'\.exe$', r'\.dll$', r'\.so$', r'\.bin$'
         ]
+        self._exclude_re = None  # Combined exclude_patterns (re.Pattern or _PatternSet), built on first use
+        self._exclude_basenames = frozenset()  # Literal exclude patterns, for exact name hits
+        self._exclude_key: Optional[Tuple[str, ...]] = None  # exclude_patterns the regex was built from
+        self._literal_needle: Optional[bytes] = None  # Literal search text as UTF-8, for prefiltering
+        self._required_text: Optional[str] = None  # Text every match of the current pattern contains
+        self._scan_plan: Optional[_ByteScanPlan] = None  # Bytes scan for the current pattern
+        self._scan_backend = _SCAN_BACKEND  # Engine for the whole-file candidate scan
+        self._scan_automaton = None  # Aho-Corasick automaton for the current pattern
+        self._candidate_regex: Optional[re.Pattern] = None  # Joined-text candidate scan for archives and metadata
+        self._binary_regex: Optional[re.Pattern] = None  # Bytes pattern for binary files
     
     def search(self, root_path: str, pattern: str) -> List[SearchMatch]:
         """
@@ -137,6 +915,7 @@ class SearchEngine:
             List of SearchMatch objects
         """
         matches = []
+        self._cancel_event.clear()
         
         if not pattern:
             return matches
@@ -149,75 +928,298 @@ class SearchEngine:
         
         # Compile regex pattern
         try:
-            if self.use_regex:
-                flags = 0 if self.case_sensitive else re.IGNORECASE
-                regex = re.compile(pattern, flags)
-            else:
-                # Escape special regex characters for literal search
-                escaped_pattern = re.escape(pattern)
-                if self.whole_word:
-                    escaped_pattern = r'\b' + escaped_pattern + r'\b'
-                flags = 0 if self.case_sensitive else re.IGNORECASE
-                regex = re.compile(escaped_pattern, flags)
+            regex = self._compile(pattern, self.use_regex, self.whole_word, self.case_sensitive)
         except re.error as e:
             print(f"Invalid regex pattern: {e}")
             return matches
         
+        # Case-sensitive literal searches can reject files with a plain substring check
+        # (not across line breaks, which text mode translates)
+        literal = _regex_literal(pattern) if self.use_regex else pattern
+        if literal is not None and self.case_sensitive and '\n' not in literal and '\r' not in literal:
+            self._literal_needle = literal.encode('utf-8')
+        else:
+            self._literal_needle = None
+        self._prepare_scan(regex)
+        
+        # Pick up edits made directly to exclude_patterns or file_extensions since the last search
+        if self._exclude_key != tuple(self.exclude_patterns):
+            self._exclude_re = None
+        if self._exclude_re is None:
+            # Build here rather than in the walker thread, so a bad pattern raises from search()
+            self._rebuild_exclude_re()
+        self._ext_tuple = tuple(self.file_extensions)
+        
         # Check if root_path is a file or directory
         if os.path.isfile(root_path):
             # Search in single file
-            if not self._is_excluded(root_path):
-                # Check file extension filter
-                if not self.file_extensions or any(root_path.endswith(ext) for ext in self.file_extensions):
-                    file_matches = self._search_file(root_path, regex)
-                    matches.extend(file_matches)
+            file_size = os.path.getsize(root_path)
+            if self._should_scan(root_path, file_size):
+                file_matches = self._search_file(root_path, regex, file_size, max_hits=self.max_results)
+                matches.extend(file_matches)
         else:
-            # Walk directory tree
-            for root, dirs, files in os.walk(root_path):
-                # Early exit if max results reached (when limit is set)
-                if self.max_results > 0 and len(matches) >= self.max_results:
-                    break
-                    
-                # Filter out excluded directories
-                dirs[:] = [d for d in dirs if not self._is_excluded(os.path.join(root, d))]
+            matches = self._search_directory(root_path, regex)
+        
+        return matches
+    
+    def _prepare_scan(self, regex: re.Pattern):
+        """Derive the text and bytes scanners for regex once per search instead of once per file"""
+        self._required_text = _required_literal(regex.pattern, regex.flags)
+        self._candidate_regex = _joined_candidate_regex(regex.pattern, regex.flags)
+        self._binary_regex = _binary_regex(regex.pattern, regex.flags)
+        self._scan_plan = _byte_scan_plan(regex.pattern, regex.flags, self._scan_backend)
+        if self._scan_plan is not None and self._literal_needle is None:
+            self._scan_automaton = _literal_automaton(regex.pattern, regex.flags)
+        else:
+            self._scan_automaton = None
+    
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _compile(pattern: str, use_regex: bool, whole_word: bool, case_sensitive: bool) -> re.Pattern:
+        """Compile a search pattern, reusing the result for repeated searches"""
+        flags = 0 if case_sensitive else re.IGNORECASE
+        if use_regex:
+            return re.compile(pattern, flags)
+        
+        # Escape special regex characters for literal search
+        escaped_pattern = re.escape(pattern)
+        if whole_word:
+            escaped_pattern = r'\b' + escaped_pattern + r'\b'
+        return re.compile(escaped_pattern, flags)
+    
+    def _iter_files(self, root_path: str) -> Iterator[Tuple[str, int]]:
+        """
+        Walk directory tree yielding (path, size) for files that pass exclusion, extension and size filters
+        
+        Uses os.scandir directly so each file's size comes from its directory entry,
+        in the same top-down order as os.walk (symlinked directories are not followed).
+        """
+        if self._exclude_re is None:
+            self._rebuild_exclude_re()
+        exclude_basenames = self._exclude_basenames
+        exclude_search = self._exclude_re.search  # Same test as _is_excluded, without the method calls
+        ext_tuple = self._ext_tuple
+        metadata_exts = self._metadata_only_extensions()
+        max_size = self.max_search_file_size
+        stack = [root_path]
+        
+        while stack:
+            if self._cancel_event.is_set():
+                return
+            
+            root = stack.pop()
+            try:
+                with os.scandir(root) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            
+            subdirs = []
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
                 
-                for file in files:
-                    # Early exit if max results reached (when limit is set)
-                    if self.max_results > 0 and len(matches) >= self.max_results:
-                        break
-                        
-                    file_path = os.path.join(root, file)
-                    
-                    # Skip excluded files
-                    if self._is_excluded(file_path):
+                if is_dir:
+                    # Filter out excluded directories (exact literal names skip the regex)
+                    if entry.name in exclude_basenames or exclude_search(entry.path.replace('\\', '/')):
                         continue
-                    
-                    # Check file extension filter
-                    if self.file_extensions:
-                        if not any(file.endswith(ext) for ext in self.file_extensions):
-                            continue
-                    
-                    # Search in file
-                    file_matches = self._search_file(file_path, regex)
-                    matches.extend(file_matches)
+                    try:
+                        if not entry.is_symlink():
+                            subdirs.append(entry.path)
+                    except OSError:
+                        pass
+                    continue
+                
+                # Check file extension filter
+                if ext_tuple and not entry.name.endswith(ext_tuple):
+                    continue
+                
+                # Metadata-only searches never look at other files, so skip them before the stat
+                if metadata_exts is not None and os.path.splitext(entry.name)[1].lower() not in metadata_exts:
+                    continue
+                
+                # Skip excluded files
+                if exclude_search(entry.path.replace('\\', '/')):
+                    continue
+                
+                try:
+                    file_size = entry.stat().st_size
+                except OSError:
+                    continue
+                
+                # Oversized files are dropped here rather than queued for a worker to reject
+                if file_size > max_size:
+                    continue
+                
+                yield entry.path, file_size
+            
+            # Visit subdirectories in listing order, like os.walk
+            stack.extend(reversed(subdirs))
+    
+    def _metadata_only_extensions(self) -> Optional[frozenset]:
+        """Extensions _search_file handles when a metadata search is enabled, or None for all files"""
+        if not (self.search_metadata or self.search_file_metadata):
+            return None
+        extensions = set()
+        if self.search_in_archives:
+            extensions |= self.ARCHIVE_EXTENSIONS
+        if self.search_metadata:
+            extensions |= self.IMAGE_EXTENSIONS
+        if self.search_file_metadata:
+            extensions |= self.FILE_METADATA_EXTENSIONS
+        return frozenset(extensions)
+    
+    def _iter_files_prefetched(self, root_path: str) -> Iterator[Tuple[str, int]]:
+        """
+        Run _iter_files in a background thread, yielding its results through a bounded queue
         
+        Directory listing and stat latency (slow disks, network shares) then overlaps
+        with file searching instead of stalling job submission.
+        """
+        done = object()
+        files = queue.Queue(maxsize=self.WALK_PREFETCH)
+        stop = threading.Event()  # Set when the consumer goes away
+        failure = []  # Exception that ended the walk, re-raised to the consumer
+        
+        def put(item) -> bool:
+            while not (stop.is_set() or self._cancel_event.is_set()):
+                try:
+                    files.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+        
+        def walk():
+            try:
+                for item in self._iter_files(root_path):
+                    if not put(item):
+                        return
+            except Exception as e:
+                failure.append(e)
+            finally:
+                put(done)
+        
+        walker = threading.Thread(target=walk, name='search-walker', daemon=True)
+        walker.start()
+        try:
+            while True:
+                try:
+                    item = files.get(timeout=0.1)
+                except queue.Empty:
+                    if self._cancel_event.is_set() or not walker.is_alive() and files.empty():
+                        break
+                    continue
+                if item is done:
+                    break
+                yield item
+            if failure:
+                raise failure[0]
+        finally:
+            stop.set()
+    
+    def _search_directory(self, root_path: str, regex: re.Pattern) -> List[SearchMatch]:
+        """Search files under root_path in parallel using a thread pool"""
+        results = []  # (walk order, file matches)
+        total = 0
+        pending = set()
+        max_pending = self.max_workers * 2  # Bound queued work so early exit stays cheap
+        
+        def collect(done):
+            nonlocal total
+            for future in done:
+                if self.max_results > 0 and total >= self.max_results:
+                    # Files still running when the limit was reached add nothing more
+                    break
+                file_matches = future.result()
+                if file_matches:
+                    results.append((future.order, file_matches))
+                    total += len(file_matches)
+            # Early exit if max results reached (when limit is set)
+            if self.max_results > 0 and total >= self.max_results:
+                self._cancel_event.set()
+                for future in pending:
+                    future.cancel()
+        
+        executor = self._get_thread_pool()
+        try:
+            for order, (file_path, file_size) in enumerate(self._iter_files_prefetched(root_path)):
+                if self._cancel_event.is_set():
+                    break
+                remaining = self.max_results - total if self.max_results > 0 else 0
+                future = executor.submit(self._search_file, file_path, regex, file_size, remaining)
+                future.order = order
+                pending.add(future)
+                if len(pending) >= max_pending:
+                    done, pending = concurrent.futures.wait(
+                        pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                    collect(done)
+        except BaseException:
+            # The pool outlives this search, so drop work nobody will collect
+            for future in pending:
+                future.cancel()
+            raise
+        
+        for future in pending:
+            if self._cancel_event.is_set():
+                future.cancel()
+        collect(f for f in concurrent.futures.as_completed(pending) if not f.cancelled())
+        
+        # Keep results in directory walk order
+        results.sort(key=lambda item: item[0])
+        matches = [match for _, file_matches in results for match in file_matches]
+        if self.max_results > 0:
+            del matches[self.max_results:]
         return matches
     
+    def _should_scan(self, path: str, size: int) -> bool:
+        """Check a file against the exclusion, extension and size filters before it is opened"""
+        if self._ext_tuple and not path.endswith(self._ext_tuple):
+            return False
+        if self._is_excluded(path):
+            return False
+        return size <= self.max_search_file_size
+    
     def _is_excluded(self, path: str) -> bool:
         """Check if path should be excluded"""
-        path = path.replace('\\', '/')
-        for pattern in self.exclude_patterns:
-            if re.search(pattern, path):
-                return True
-        return False
+        if self._exclude_re is None:
+            self._rebuild_exclude_re()
+        return self._exclude_re.search(path.replace('\\', '/')) is not None
+    
+    def _rebuild_exclude_re(self):
+        """Compile all exclude patterns into a single alternation"""
+        self._exclude_key = tuple(self.exclude_patterns)
+        self._exclude_basenames = frozenset(
+            _LITERAL_ESCAPE_RE.sub(r'\1', p) for p in self.exclude_patterns
+            if _LITERAL_PATTERN_RE.fullmatch(p) and '/' not in p
+        )
+        if self.exclude_patterns:
+            try:
+                self._exclude_re = re.compile('|'.join(f'(?:{p})' for p in self.exclude_patterns))
+            except re.error:
+                # Global inline flags like (?i) or a group name used twice only work on their own
+                self._exclude_re = _PatternSet(self.exclude_patterns)
+        else:
+            # Never matches
+            self._exclude_re = re.compile(r'(?!)')
     
-    def _search_file(self, file_path: str, regex: re.Pattern) -> List[SearchMatch]:
-        """Search for pattern in a single file (optimized)"""
+    def _search_file(self, file_path: str, regex: re.Pattern,
+                     file_size: Optional[int] = None, max_hits: int = 0) -> List[SearchMatch]:
+        """
+        Search for pattern in a single file (optimized)
+        
+        file_size avoids a stat when already known; max_hits > 0 stops after that many matches.
+        """
         matches = []
+        # One shared path string for every match in this file
+        file_path = sys.intern(file_path)
         
         try:
             # Check file size first (skip very large files)
-            file_size = os.path.getsize(file_path)
+            if file_size is None:
+                file_size = os.path.getsize(file_path)
             if file_size > self.max_search_file_size:
                 return matches
             
@@ -225,7 +1227,7 @@ class SearchEngine:
             
             # Check if this is an archive file and archive search is enabled
             if self.search_in_archives and file_ext in self.ARCHIVE_EXTENSIONS:
-                archive_matches = self._search_archive(file_path, regex)
+                archive_matches = self._search_archive(file_path, regex, max_hits)
                 matches.extend(archive_matches)
                 return matches
             
@@ -249,38 +1251,12 @@ class SearchEngine:
             
             # Binary/hex search mode
             if self.hex_search:
-                hex_matches = self._search_binary(file_path, regex)
+                hex_matches = self._search_binary(file_path, regex, max_hits)
                 matches.extend(hex_matches)
                 return matches
             
-            # Try to read as text file
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                lines = f.readlines()
-            
-            # Search each line
-            for i, line in enumerate(lines):
-                for match in regex.finditer(line):
-                    # Get context lines
-                    context_before = []
-                    context_after = []
-                    
-                    start_idx = max(0, i - self.context_lines)
-                    end_idx = min(len(lines), i + self.context_lines + 1)
-                    
-                    if self.context_lines > 0:
-                        context_before = [lines[j].rstrip('\n\r') for j in range(start_idx, i)]
-                        context_after = [lines[j].rstrip('\n\r') for j in range(i + 1, end_idx)]
-                    
-                    search_match = SearchMatch(
-                        file_path=file_path,
-                        line_number=i + 1,  # 1-based line numbers
-                        line_content=line.rstrip('\n\r'),
-                        match_start=match.start(),
-                        match_end=match.end(),
-                        context_before=context_before,
-                        context_after=context_after
-                    )
-                    matches.append(search_match)
+            # Search as text file
+            matches.extend(self._search_text_file(file_path, regex, max_hits))
         
         except (IOError, OSError, UnicodeDecodeError):
             # Skip files that can't be read
@@ -288,37 +1264,251 @@ class SearchEngine:
         
         return matches
     
-    def _search_image_metadata(self, file_path: str, regex: re.Pattern) -> List[SearchMatch]:
-        """Search image metadata for pattern matches"""
+    def _search_text_file(self, file_path: str, regex: re.Pattern, max_hits: int = 0) -> List[SearchMatch]:
+        """Search a text file, scanning a memory map with a bytes regex when possible"""
+        plan = self._scan_plan
+        probe_binary = self.binary_mode != 'text'
+        with open(file_path, 'rb') as f:
+            if plan is not None or self._literal_needle is not None or probe_binary:
+                try:
+                    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:
+                    # Empty file - no lines to match
+                    return []
+                with mm:
+                    _advise_readahead(mm)
+                    if probe_binary and self._looks_binary(mm[:self.BINARY_PROBE_SIZE]):
+                        return []
+                    if self._literal_needle is not None and mm.find(self._literal_needle) < 0:
+                        # Literal text does not occur anywhere in the file
+                        return []
+                    if plan is not None and _plan_fits(plan, mm):
+                        if self._literal_needle is not None:
+                            spans = _literal_spans(self._literal_needle, mm)
+                        elif self._scan_automaton is not None:
+                            spans = _automaton_spans(self._scan_automaton, mm, bool(regex.flags & re.IGNORECASE))
+                        else:
+                            spans = plan.backend.spans(plan.regex, mm)
+                        try:
+                            return self._search_mapped(file_path, mm, regex, spans, max_hits)
+                        finally:
+                            # A scan stopped at max_hits still holds the mapping's buffer
+                            spans.close()
+            
+            # Fall back to streaming lines in text mode, reusing the open file
+            stream = io.TextIOWrapper(f, encoding='utf-8', errors='ignore')
+            try:
+                return self._scan_text_stream(stream, regex, file_path, max_hits)
+            finally:
+                stream.detach()
+    
+    def _scan_text_stream(self, stream: Iterator[str], regex: re.Pattern,
+                          path_label: str, max_hits: int = 0) -> List[SearchMatch]:
+        """
+        Search lines of a text stream, keeping only the context window in memory
+        
+        Matched lines wait in a queue until their context_after has been read.
+        """
         matches = []
+        context_lines = self.context_lines
+        before = deque(maxlen=context_lines)  # Raw lines preceding the current one
+        # Matched lines waiting for their context_after:
+        # (line number, line text, context before, match spans, context after so far)
+        pending = deque()
+        found = 0
         
-        if not PILLOW_AVAILABLE:
-            return matches
+        def emit(line_number, line_content, context_before, spans, context_after):
+            context_after = tuple(context_after)  # The () singleton stays as it is
+            for start, end in spans:
+                matches.append(SearchMatch(
+                    file_path=path_label,
+                    line_number=line_number,
+                    line_content=line_content,
+                    match_start=start,
+                    match_end=end,
+                    context_before=context_before,
+                    context_after=context_after
+                ))
         
-        try:
-            with Image.open(file_path) as img:
-                metadata = self._extract_image_metadata(img)
+        # Local names for the per-line loop
+        finditer = regex.finditer
+        remember = before.append
+        # Lines without the required text cannot match, and a substring test is much cheaper than finditer
+        literal = self._required_text
+        
+        for i, line in enumerate(stream):
+            stripped = None  # Line without its newline, made at most once
+            if pending:
+                stripped = line.rstrip('\n\r')
+                for entry in pending:
+                    entry[4].append(stripped)
+                while pending and len(pending[0][4]) >= context_lines:
+                    emit(*pending.popleft())
+            
+            if max_hits and found >= max_hits:
+                if not pending:
+                    break
+                # Only reading on for the context of matches already found
+                continue
+            
+            spans = []
+            if literal is None or literal in line:
+                for match in finditer(line):
+                    spans.append(match.span())
+                    found += 1
+                    if max_hits and found >= max_hits:
+                        break
+            
+            if spans:
+                # Build line text and context once, shared by every match on this line
+                if stripped is None:
+                    stripped = line.rstrip('\n\r')
+                if context_lines > 0:
+                    # rstrip hands back already-stripped lines without copying them
+                    context_before = tuple(l.rstrip('\n\r') for l in before)
+                    pending.append((i + 1, stripped, context_before, spans, []))  # 1-based line numbers
+                else:
+                    emit(i + 1, stripped, (), spans, ())
+            if context_lines > 0:
+                remember(line if stripped is None else stripped)
+        
+        # Matches near the end of the file get whatever context follows them
+        for entry in pending:
+            emit(*entry)
+        
+        return matches
+    
+    def _looks_binary(self, head: bytes) -> bool:
+        """Check the start of a file for binary content according to binary_mode"""
+        if b'\x00' in head:
+            return True
+        if self.binary_mode == 'auto':
+            # Mostly undecodable bytes means this is not UTF-8 text
+            invalid = head.decode('utf-8', errors='replace').count('\ufffd')
+            return invalid * 4 > len(head)
+        return False
+    
+    def _search_mapped(self, file_path: str, mm: mmap.mmap, regex: re.Pattern,
+                       spans: Iterator[Tuple[int, int]], max_hits: int = 0) -> List[SearchMatch]:
+        """
+        Search a memory-mapped text file
+        
+        spans are byte ranges of candidate hits from a single pass over the mapping
+        (bytes regex or Aho-Corasick), in increasing order of end offset. Only the
+        lines they touch are decoded and matched with the str regex, so results are
+        identical to matching every line separately.
+        """
+        matches = []
+        size = len(mm)
+        counted_pos = 0  # Newlines before this offset are counted in line_number
+        line_number = 1
+        next_line_start = 0  # Lines before this offset were already searched
+        # Local names for the per-candidate loop
+        find = mm.find
+        finditer = regex.finditer
+        
+        for start, end in spans:
+            if end < next_line_start:
+                # Candidate lies within lines that were already searched
+                continue
+            # Every line touched by the candidate may contain a real match
+            line_start = mm.rfind(b'\n', 0, start) + 1
+            span_end = max(end - 1, start)
+            while line_start < size:  # Text mode has no line after a final newline
+                line_end = find(b'\n', line_start)
+                if line_end < 0:
+                    line_end = size
                 
-                # Convert metadata to searchable text
-                line_num = 1
-                for key, value in metadata.items():
-                    # Create searchable line from metadata
-                    line_text = f"{key}: {value}"
+                if line_start >= next_line_start:
+                    next_line_start = line_end + 1
+                    line_number += _count_newlines(mm, counted_pos, line_start)
+                    counted_pos = line_start
                     
-                    # Search for matches in this metadata line
-                    for match in regex.finditer(line_text):
+                    line_content = _decode_line(mm, line_start, line_end)
+                    # Keep the newline so the str regex sees the same line as in text mode
+                    line = line_content + '\n' if line_end < size else line_content
+                    context_before = None
+                    for match in finditer(line):
+                        if context_before is None:
+                            # Decode context once, shared by every match on this line
+                            context_before = ()
+                            context_after = ()
+                            if self.context_lines > 0:
+                                context_before = self._mapped_context_before(mm, line_start)
+                                context_after = self._mapped_context_after(mm, line_end)
+                        
                         search_match = SearchMatch(
                             file_path=file_path,
-                            line_number=line_num,
-                            line_content=line_text,
+                            line_number=line_number,
+                            line_content=line_content,
                             match_start=match.start(),
                             match_end=match.end(),
-                            context_before=[],
-                            context_after=[]
+                            context_before=context_before,
+                            context_after=context_after
                         )
                         matches.append(search_match)
-                    
-                    line_num += 1
+                        if max_hits and len(matches) >= max_hits:
+                            return matches
+                
+                if line_end >= span_end or line_end >= size:
+                    break
+                line_start = line_end + 1
+        
+        return matches
+    
+    def _mapped_context_before(self, mm: mmap.mmap, line_start: int) -> Tuple[str, ...]:
+        """Get up to context_lines decoded lines before the line starting at line_start"""
+        if line_start == 0:
+            return ()
+        block_start = line_start
+        for _ in range(self.context_lines):
+            if block_start == 0:
+                break
+            block_start = mm.rfind(b'\n', 0, block_start - 1) + 1
+        return _decode_lines(mm, block_start, line_start - 1)
+    
+    def _mapped_context_after(self, mm: mmap.mmap, line_end: int) -> Tuple[str, ...]:
+        """Get up to context_lines decoded lines after the line ending at line_end"""
+        size = len(mm)
+        if line_end + 1 >= size:
+            return ()
+        block_end = line_end
+        for _ in range(self.context_lines):
+            if block_end + 1 >= size:
+                break
+            block_end = mm.find(b'\n', block_end + 1)
+            if block_end < 0:
+                block_end = size
+        return _decode_lines(mm, line_end + 1, block_end)
+    
+    @staticmethod
+    def _count_body_paragraphs(document) -> int:
+        """Count the top-level paragraphs of word/document.xml without keeping the tree in memory"""
+        paragraph_tag = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}p'
+        count = 0
+        depth = 0
+        for event, elem in ET.iterparse(document, events=('start', 'end')):
+            if event == 'start':
+                depth += 1
+                continue
+            # Depth 3 is w:document > w:body > w:p, the paragraphs python-docx lists
+            if depth == 3 and elem.tag == paragraph_tag:
+                count += 1
+            depth -= 1
+            elem.clear()
+        return count
+    
+    def _search_image_metadata(self, file_path: str, regex: re.Pattern) -> List[SearchMatch]:
+        """Search image metadata for pattern matches"""
+        matches = []
+        
+        if not PILLOW_AVAILABLE:
+            return matches
+        
+        try:
+            with Image.open(file_path) as img:
+                metadata = self._extract_image_metadata(img)
+                matches = self._search_metadata_lines(file_path, metadata, regex)
         
         except Exception:
             # Skip files that can't be opened as images
@@ -370,32 +1560,97 @@ class SearchEngine:
     
     def _search_file_metadata(self, file_path: str, regex: re.Pattern) -> List[SearchMatch]:
         """Search file metadata for pattern matches"""
+        if os.path.splitext(file_path)[1].lower() in self.PROCESS_METADATA_EXTENSIONS:
+            metadata = self._extract_file_metadata_in_process(file_path)
+        else:
+            metadata = self._extract_file_metadata(file_path)
+        
+        return self._search_metadata_lines(file_path, metadata, regex)
+    
+    def _search_metadata_lines(self, file_path: str, metadata: Dict[str, Any],
+                               regex: re.Pattern) -> List[SearchMatch]:
+        """
+        Search metadata as "key: value" lines
+        
+        All lines are joined and scanned in one pass to find candidate lines, which
+        are then matched individually so results are the same as per-line matching.
+        """
         matches = []
-        metadata = self._extract_file_metadata(file_path)
+        lines = [f"{key}: {value}" for key, value in metadata.items()]
+        if not lines:
+            return matches
         
-        # Convert metadata to searchable text
-        line_num = 1
-        for key, value in metadata.items():
-            # Create searchable line from metadata
-            line_text = f"{key}: {value}"
-            
-            # Search for matches in this metadata line
+        candidate_regex = self._candidate_regex
+        if candidate_regex is None:
+            line_indices = range(len(lines))
+        else:
+            # Start offset of each line in the joined text; values may hold newlines themselves
+            starts = list(accumulate((len(line) + 1 for line in lines[:-1]), initial=0))
+            touched = set()
+            for candidate in candidate_regex.finditer('\n'.join(lines)):
+                first = bisect_right(starts, candidate.start()) - 1
+                last = bisect_right(starts, max(candidate.end() - 1, candidate.start())) - 1
+                touched.update(range(first, last + 1))
+            line_indices = sorted(touched)
+        
+        for i in line_indices:
+            line_text = lines[i]
             for match in regex.finditer(line_text):
                 search_match = SearchMatch(
                     file_path=file_path,
-                    line_number=line_num,
+                    line_number=i + 1,
                     line_content=line_text,
                     match_start=match.start(),
                     match_end=match.end(),
-                    context_before=[],
-                    context_after=[]
+                    context_before=(),
+                    context_after=()
                 )
                 matches.append(search_match)
-            
-            line_num += 1
         
         return matches
     
+    def _get_thread_pool(self) -> concurrent.futures.ThreadPoolExecutor:
+        """Get the file search thread pool, recreating it if max_workers changed"""
+        if self._thread_pool is None or self._thread_pool_workers != self.max_workers:
+            if self._thread_pool is not None:
+                self._thread_pool.shutdown(wait=False)
+            self._thread_pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix='search')
+            self._thread_pool_workers = self.max_workers
+        return self._thread_pool
+    
+    def _get_archive_pool(self) -> concurrent.futures.ThreadPoolExecutor:
+        """Get the archive member thread pool, creating it on first use"""
+        with self._archive_pool_lock:
+            if self._archive_pool is None:
+                self._archive_pool = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.ARCHIVE_WORKERS, thread_name_prefix='archive')
+            return self._archive_pool
+    
+    def _get_process_pool(self) -> concurrent.futures.ProcessPoolExecutor:
+        """Get the metadata process pool, creating it on first use"""
+        with self._process_pool_lock:
+            if self._process_pool is None:
+                # Spawn rather than fork: forking a process with Qt and worker threads is unsafe
+                self._process_pool = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=min(self.MAX_PROCESS_WORKERS, os.cpu_count() or 1),
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._process_pool
+    
+    def _extract_file_metadata_in_process(self, file_path: str) -> Dict[str, Any]:
+        """Extract file metadata in the process pool so parsing runs outside the GIL"""
+        try:
+            return self._get_process_pool().submit(_extract_file_metadata_worker, file_path).result()
+        except concurrent.futures.process.BrokenProcessPool:
+            # A worker died - start a fresh pool next time and parse this file here
+            with self._process_pool_lock:
+                self._process_pool = None
+        except Exception:
+            # Pool could not start or the result could not be pickled
+            pass
+        return self._extract_file_metadata(file_path)
+    
     def _extract_file_metadata(self, file_path: str) -> Dict[str, Any]:
         """Extract metadata from various file types"""
         metadata = {}
@@ -441,46 +1696,47 @@ class SearchEngine:
             elif file_ext == '.celtx' and ZIPFILE_AVAILABLE:
                 # Celtx is a ZIP archive with HTML/XML
                 with zipfile.ZipFile(file_path, 'r') as z:
-                    if 'project.celtx' in z.namelist():
+                    names = z.namelist()
+                    if 'project.celtx' in names:
                         content = z.read('project.celtx').decode('utf-8', errors='ignore')
                         # Basic metadata extraction
                         metadata['Type'] = 'Celtx Project'
-                        metadata['Files'] = str(len(z.namelist()))
+                        metadata['Files'] = str(len(names))
             
             # Archive formats
             elif file_ext == '.zip' and ZIPFILE_AVAILABLE:
                 with zipfile.ZipFile(file_path, 'r') as z:
-                    metadata['Files'] = str(len(z.namelist()))
+                    # namelist() builds a new list on every call
+                    names = z.namelist()
+                    metadata['Files'] = str(len(names))
                     metadata['Compressed Size'] = f"{os.path.getsize(file_path) / 1024:.1f} KB"
                     # List first 10 files
-                    file_list = z.namelist()[:10]
-                    metadata['Contents'] = ', '.join(file_list)
-                    if len(z.namelist()) > 10:
-                        metadata['Contents'] += f' ... and {len(z.namelist()) - 10} more'
+                    metadata['Contents'] = ', '.join(names[:10])
+                    if len(names) > 10:
+                        metadata['Contents'] += f' ... and {len(names) - 10} more'
                         
             elif file_ext == '.epub' and ZIPFILE_AVAILABLE:
                 # EPUB is a ZIP with specific structure
                 with zipfile.ZipFile(file_path, 'r') as z:
                     # Try to read metadata from content.opf
-                    for name in z.namelist():
-                        if name.endswith('.opf'):
-                            content = z.read(name).decode('utf-8', errors='ignore')
-                            if XML_AVAILABLE:
-                                try:
-                                    root = ET.fromstring(content)
-                                    # Extract Dublin Core metadata
-                                    ns = {'dc': 'http://purl.org/dc/elements/1.1/'}
-                                    for elem in root.findall('.//dc:title', ns):
-                                        metadata['Title'] = elem.text[:200] if elem.text else ''
-                                    for elem in root.findall('.//dc:creator', ns):
-                                        metadata['Author'] = elem.text[:200] if elem.text else ''
-                                    for elem in root.findall('.//dc:publisher', ns):
-                                        metadata['Publisher'] = elem.text[:200] if elem.text else ''
-                                    for elem in root.findall('.//dc:language', ns):
-                                        metadata['Language'] = elem.text if elem.text else ''
-                                except Exception:
-                                    pass
-                            break
+                    opf_name = next((name for name in z.namelist() if name.endswith('.opf')), None)
+                    if opf_name is not None:
+                        content = z.read(opf_name).decode('utf-8', errors='ignore')
+                        if XML_AVAILABLE:
+                            try:
+                                root = ET.fromstring(content)
+                                # Extract Dublin Core metadata
+                                ns = self._DUBLIN_CORE_NS
+                                for elem in root.findall('.//dc:title', ns):
+                                    metadata['Title'] = elem.text[:200] if elem.text else ''
+                                for elem in root.findall('.//dc:creator', ns):
+                                    metadata['Author'] = elem.text[:200] if elem.text else ''
+                                for elem in root.findall('.//dc:publisher', ns):
+                                    metadata['Publisher'] = elem.text[:200] if elem.text else ''
+                                for elem in root.findall('.//dc:language', ns):
+                                    metadata['Language'] = elem.text if elem.text else ''
+                            except Exception:
+                                pass
             
             # Structured data formats
             elif file_ext == '.csv' and CSV_AVAILABLE:
@@ -551,36 +1807,75 @@ class SearchEngine:
                     if pdf.metadata:
                         for key, value in pdf.metadata.items():
                             metadata[f"PDF_{key.strip('/')}"] = str(value)[:200]
-                    metadata['PDF_Pages'] = str(len(pdf.pages))
+                    # The page tree root's /Count avoids flattening every page object
+                    try:
+                        page_count = int(pdf.trailer['/Root']['/Pages']['/Count'])
+                    except Exception:
+                        page_count = -1
+                    if page_count < 0:
+                        page_count = len(pdf.pages)
+                    metadata['PDF_Pages'] = str(page_count)
             
             # Word documents
-            elif file_ext == '.docx' and DOCX_AVAILABLE:
-                doc = docx.Document(file_path)
-                props = doc.core_properties
-                if props.author: metadata['Author'] = props.author
-                if props.title: metadata['Title'] = props.title
-                if props.subject: metadata['Subject'] = props.subject
-                if props.keywords: metadata['Keywords'] = props.keywords
-                if props.category: metadata['Category'] = props.category
-                if props.comments: metadata['Comments'] = props.comments[:200]
-                if props.created: metadata['Created'] = str(props.created)
-                if props.modified: metadata['Modified'] = str(props.modified)
-                metadata['Paragraphs'] = str(len(doc.paragraphs))
+            elif file_ext == '.docx' and (DOCX_AVAILABLE or (ZIPFILE_AVAILABLE and XML_AVAILABLE)):
+                core = None
+                if ZIPFILE_AVAILABLE and XML_AVAILABLE:
+                    # Properties live in docProps/core.xml; no need to build the document model
+                    with zipfile.ZipFile(file_path, 'r') as z:
+                        core = _read_core_properties(z)
+                        if core is not None:
+                            for key, name in (('Author', 'creator'), ('Title', 'title'), ('Subject', 'subject'),
+                                              ('Keywords', 'keywords'), ('Category', 'category')):
+                                if name in core: metadata[key] = core[name]
+                            if 'description' in core: metadata['Comments'] = core['description'][:200]
+                            if 'created' in core: metadata['Created'] = _format_w3cdtf(core['created'])
+                            if 'modified' in core: metadata['Modified'] = _format_w3cdtf(core['modified'])
+                            with z.open('word/document.xml') as document:
+                                metadata['Paragraphs'] = str(self._count_body_paragraphs(document))
+                
+                if core is None and DOCX_AVAILABLE:
+                    doc = docx.Document(file_path)
+                    props = doc.core_properties
+                    if props.author: metadata['Author'] = props.author
+                    if props.title: metadata['Title'] = props.title
+                    if props.subject: metadata['Subject'] = props.subject
+                    if props.keywords: metadata['Keywords'] = props.keywords
+                    if props.category: metadata['Category'] = props.category
+                    if props.comments: metadata['Comments'] = props.comments[:200]
+                    if props.created: metadata['Created'] = str(props.created)
+                    if props.modified: metadata['Modified'] = str(props.modified)
+                    metadata['Paragraphs'] = str(len(doc.paragraphs))
             
             # Excel files
-            elif file_ext == '.xlsx' and OPENPYXL_AVAILABLE:
-                wb = openpyxl.load_workbook(file_path, read_only=True)
-                props = wb.properties
-                if props.creator: metadata['Creator'] = props.creator
-                if props.title: metadata['Title'] = props.title
-                if props.subject: metadata['Subject'] = props.subject
-                if props.keywords: metadata['Keywords'] = props.keywords
-                if props.category: metadata['Category'] = props.category
-                if props.description: metadata['Description'] = props.description[:200]
-                if props.created: metadata['Created'] = str(props.created)
-                if props.modified: metadata['Modified'] = str(props.modified)
-                metadata['Sheets'] = str(len(wb.sheetnames))
-                wb.close()
+            elif file_ext == '.xlsx' and (OPENPYXL_AVAILABLE or (ZIPFILE_AVAILABLE and XML_AVAILABLE)):
+                core = None
+                if ZIPFILE_AVAILABLE and XML_AVAILABLE:
+                    # Properties live in docProps/core.xml; no need to load the workbook
+                    with zipfile.ZipFile(file_path, 'r') as z:
+                        core = _read_core_properties(z)
+                        if core is not None:
+                            for key, name in (('Creator', 'creator'), ('Title', 'title'), ('Subject', 'subject'),
+                                              ('Keywords', 'keywords'), ('Category', 'category')):
+                                if name in core: metadata[key] = core[name]
+                            if 'description' in core: metadata['Description'] = core['description'][:200]
+                            if 'created' in core: metadata['Created'] = _format_w3cdtf(core['created'], naive=True)
+                            if 'modified' in core: metadata['Modified'] = _format_w3cdtf(core['modified'], naive=True)
+                            workbook = ET.fromstring(z.read('xl/workbook.xml'))
+                            metadata['Sheets'] = str(sum(1 for elem in workbook.iter() if elem.tag.endswith('}sheet')))
+                
+                if core is None and OPENPYXL_AVAILABLE:
+                    wb = openpyxl.load_workbook(file_path, read_only=True)
+                    props = wb.properties
+                    if props.creator: metadata['Creator'] = props.creator
+                    if props.title: metadata['Title'] = props.title
+                    if props.subject: metadata['Subject'] = props.subject
+                    if props.keywords: metadata['Keywords'] = props.keywords
+                    if props.category: metadata['Category'] = props.category
+                    if props.description: metadata['Description'] = props.description[:200]
+                    if props.created: metadata['Created'] = str(props.created)
+                    if props.modified: metadata['Modified'] = str(props.modified)
+                    metadata['Sheets'] = str(len(wb.sheetnames))
+                    wb.close()
             
             # Audio/Video files
             elif file_ext in {'.mp3', '.flac', '.m4a', '.ogg', '.wma', '.mp4', '.avi', '.mkv', '.mov', '.wmv'} and MUTAGEN_AVAILABLE:
@@ -597,27 +1892,59 @@ class SearchEngine:
             
             # SQLite databases
             elif file_ext in {'.db', '.sqlite', '.sqlite3'} and SQLITE_AVAILABLE:
-                conn = sqlite3.connect(file_path)
-                cursor = conn.cursor()
-                
-                # Get all table names
-                cursor.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
-                tables = [row[0] for row in cursor.fetchall()]
-                metadata['Tables'] = ', '.join(tables)
-                metadata['Table Count'] = str(len(tables))
-                
-                # Get schema info for each table
-                for table in tables[:5]:  # Limit to first 5 tables
-                    cursor.execute(f"PRAGMA table_info({table})")
-                    columns = [row[1] for row in cursor.fetchall()]
-                    metadata[f'Table_{table}_Columns'] = ', '.join(columns)
+                # Read-only: never take a write lock or leave a journal behind. The path is
+                # percent-encoded whole, since Path.as_uri() turns a UNC path into a URI
+                # authority (file://server/share) that SQLite rejects
+                uri = 'file:' + urllib.parse.quote(os.path.abspath(file_path)) + '?mode=ro'
+                conn = sqlite3.connect(uri, uri=True)
+                try:
+                    cursor = conn.cursor()
                     
-                    # Get row count
-                    cursor.execute(f"SELECT COUNT(*) FROM {table}")
-                    row_count = cursor.fetchone()[0]
-                    metadata[f'Table_{table}_Rows'] = str(row_count)
-                
-                conn.close()
+                    # Get all table names
+                    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
+                    tables = [row[0] for row in cursor.fetchall()]
+                    metadata['Tables'] = ', '.join(tables)
+                    metadata['Table Count'] = str(len(tables))
+                    
+                    # Get schema info for the first 5 tables
+                    shown = tables[:5]
+                    limit = self.SQLITE_COUNT_LIMIT
+                    quoted = ['"' + table.replace('"', '""') + '"' for table in shown]
+                    # Row counts stop early on huge tables since COUNT(*) reads every row
+                    counts = [f"(SELECT COUNT(*) FROM (SELECT 1 FROM {name} LIMIT {limit + 1}))" for name in quoted]
+                    columns = {table: [] for table in shown}
+                    row_counts = []
+                    if shown:
+                        try:
+                            # Columns and row counts of every shown table in two statements
+                            placeholders = ', '.join('?' * len(shown))
+                            cursor.execute(
+                                "SELECT m.name, p.name FROM sqlite_master AS m, pragma_table_info(m.name) AS p "
+                                f"WHERE m.type = 'table' AND m.name IN ({placeholders}) ORDER BY p.cid",
+                                shown
+                            )
+                            for table, column in cursor.fetchall():
+                                columns[table].append(column)
+                            cursor.execute("SELECT " + ', '.join(counts))
+                            row_counts = list(cursor.fetchone())
+                        except sqlite3.Error:
+                            # Old SQLite without pragma functions, or a table that cannot be read:
+                            # query table by table, stopping at the first failure
+                            row_counts = []
+                            try:
+                                for table, name, count in zip(shown, quoted, counts):
+                                    cursor.execute(f"PRAGMA table_info({name})")
+                                    columns[table] = [row[1] for row in cursor.fetchall()]
+                                    cursor.execute(f"SELECT {count}")
+                                    row_counts.append(cursor.fetchone()[0])
+                            except sqlite3.Error:
+                                pass
+                    
+                    for table, row_count in zip(shown, row_counts):
+                        metadata[f'Table_{table}_Columns'] = ', '.join(columns[table])
+                        metadata[f'Table_{table}_Rows'] = f"{limit}+" if row_count > limit else str(row_count)
+                finally:
+                    conn.close()
             
             # RTF files
             elif file_ext == '.rtf':
@@ -625,32 +1952,30 @@ class SearchEngine:
                     content = f.read(1000)  # Read first 1KB
                     
                     # Extract basic RTF metadata from header
-                    # RTF format: {\info{\title ...}{\author ...}}
-                    import re
-                    title_match = re.search(r'\\title\s+([^}]+)', content)
+                    title_match = self._RTF_TITLE_RE.search(content)
                     if title_match:
                         metadata['Title'] = title_match.group(1).strip()[:200]
                     
-                    author_match = re.search(r'\\author\s+([^}]+)', content)
+                    author_match = self._RTF_AUTHOR_RE.search(content)
                     if author_match:
                         metadata['Author'] = author_match.group(1).strip()[:200]
                     
-                    subject_match = re.search(r'\\subject\s+([^}]+)', content)
+                    subject_match = self._RTF_SUBJECT_RE.search(content)
                     if subject_match:
                         metadata['Subject'] = subject_match.group(1).strip()[:200]
                     
                     # Get RTF version
-                    version_match = re.search(r'\\rtf(\d+)', content)
+                    version_match = self._RTF_VERSION_RE.search(content)
                     if version_match:
                         metadata['RTF Version'] = version_match.group(1)
         
-        except Exception as e:
-            # If metadata extraction fails, just skip this file
-            pass
+        except _METADATA_ERRORS as e:
+            # If metadata extraction fails, just skip this file (ET.ParseError is a SyntaxError)
+            logger.debug("Skipping metadata of %s: %r", file_path, e)
         
         return metadata
     
-    def _search_archive(self, file_path: str, regex: re.Pattern) -> List[SearchMatch]:
+    def _search_archive(self, file_path: str, regex: re.Pattern, max_hits: int = 0) -> List[SearchMatch]:
         """Search inside archive files (ZIP, EPUB, etc.)"""
         matches = []
         
@@ -659,127 +1984,269 @@ class SearchEngine:
         
         try:
             with zipfile.ZipFile(file_path, 'r') as zf:
-                for member in zf.namelist():
-                    # Skip directories
-                    if member.endswith('/'):
-                        continue
-                    
-                    # Check file size
-                    member_info = zf.getinfo(member)
-                    if member_info.file_size > self.max_search_file_size:
-                        continue
-                    
-                    try:
-                        # Read file content from archive
-                        content = zf.read(member)
-                        
-                        # Try to decode as text
-                        try:
-                            text = content.decode('utf-8', errors='ignore')
-                            lines = text.split('\n')
-                            
-                            # Search each line
-                            for i, line in enumerate(lines):
-                                for match in regex.finditer(line):
-                                    # Get context lines
-                                    context_before = []
-                                    context_after = []
-                                    
-                                    start_idx = max(0, i - self.context_lines)
-                                    end_idx = min(len(lines), i + self.context_lines + 1)
-                                    
-                                    if self.context_lines > 0:
-                                        context_before = [lines[j].rstrip('\n\r') for j in range(start_idx, i)]
-                                        context_after = [lines[j].rstrip('\n\r') for j in range(i + 1, end_idx)]
-                                    
-                                    # Use archive_path/internal_path format
-                                    search_match = SearchMatch(
-                                        file_path=f"{file_path}/{member}",
-                                        line_number=i + 1,
-                                        line_content=line.rstrip('\n\r'),
-                                        match_start=match.start(),
-                                        match_end=match.end(),
-                                        context_before=context_before,
-                                        context_after=context_after
-                                    )
-                                    matches.append(search_match)
-                        except UnicodeDecodeError:
-                            # Binary file inside archive, skip
-                            pass
-                    except Exception:
-                        # Skip files that can't be read from archive
-                        pass
-        except Exception:
-            # Skip archives that can't be opened
-            pass
+                # Choose members from the central directory, so directories, oversized members and
+                # ones zipfile cannot decrypt or decompress are never opened just to fail
+                inflatable = _inflatable_zip_methods()
+                members = [
+                    info for info in zf.infolist()
+                    if not info.is_dir()
+                    and info.file_size <= self.max_search_file_size
+                    and info.compress_type in inflatable
+                    and not info.flag_bits & 0x1  # Encrypted
+                ]
+                
+                if len(members) > 1 and sum(info.file_size for info in members) > self.ARCHIVE_PARALLEL_SIZE:
+                    return self._search_archive_parallel(zf, members, file_path, regex, max_hits)
+                
+                for member_info in members:
+                    matches.extend(self._search_archive_member(
+                        zf, member_info, file_path, regex, max_hits - len(matches) if max_hits else 0))
+                    if max_hits and len(matches) >= max_hits:
+                        break
+        except _ARCHIVE_ERRORS as e:
+            # Skip archives that can't be opened (not a zip, damaged, truncated or unreadable)
+            logger.debug("Skipping archive %s: %r", file_path, e)
         
         return matches
     
-    def _search_binary(self, file_path: str, regex: re.Pattern) -> List[SearchMatch]:
-        """Search binary files for hex patterns"""
+    def _search_archive_parallel(self, zf: 'zipfile.ZipFile', members: List['zipfile.ZipInfo'],
+                                 file_path: str, regex: re.Pattern, max_hits: int = 0) -> List[SearchMatch]:
+        """Search archive members on the archive pool, returning matches in member order"""
+        matches = []
+        pool = self._get_archive_pool()
+        window = 2 * self.ARCHIVE_WORKERS  # Bounds the decoded members held at once
+        pending = deque()
+        remaining = iter(members)
+        try:
+            while True:
+                for member_info in remaining:
+                    pending.append(pool.submit(
+                        self._search_archive_member, zf, member_info, file_path, regex, max_hits))
+                    if len(pending) >= window:
+                        break
+                if not pending:
+                    break
+                matches.extend(pending.popleft().result())
+                if max_hits and len(matches) >= max_hits:
+                    return matches[:max_hits]
+        finally:
+            # Members still being read must finish before the archive is closed
+            for future in pending:
+                future.cancel()
+            concurrent.futures.wait(pending)
+        return matches
+    
+    def _search_archive_member(self, zf: 'zipfile.ZipFile', member_info: 'zipfile.ZipInfo', file_path: str,
+                               regex: re.Pattern, max_hits: int = 0) -> List[SearchMatch]:
+        """Search one member of an open archive; several threads may search one archive at once"""
         matches = []
+        member = member_info.filename
+        # One pass over the member's text finds the lines worth matching
+        candidate_regex = self._candidate_regex
+        required = self._required_text
         
         try:
-            with open(file_path, 'rb') as f:
-                content = f.read()
-            
-            # Convert pattern to bytes if it looks like hex
-            pattern_str = regex.pattern
+            # Stream the member so binary content is rejected before it is all inflated
+            with zf.open(member_info) as raw:
+                head = raw.read(self.BINARY_PROBE_SIZE)
+                if self.binary_mode != 'text' and self._looks_binary(head):
+                    return matches
+                member_path = sys.intern(f"{file_path}/{member}")
+                if candidate_regex is None or member_info.file_size > self.ARCHIVE_STREAM_SIZE:
+                    # Keep only the context window in memory; without a candidate
+                    # regex the whole text would be matched line by line anyway
+                    raw.seek(0)
+                    stream = io.TextIOWrapper(raw, encoding='utf-8', errors='ignore', newline='\n')
+                    try:
+                        return self._scan_text_stream(_split_stream(stream), regex, member_path, max_hits)
+                    finally:
+                        stream.detach()
+                content = head + raw.read()
             
-            # Try to match as both text and hex
-            # Search for text pattern in binary content
-            try:
-                text_content = content.decode('utf-8', errors='ignore')
-                for match in regex.finditer(text_content):
-                    # Calculate byte offset
-                    byte_offset = match.start()
-                    
-                    # Get hex dump context (16 bytes before and after)
-                    start = max(0, byte_offset - 16)
-                    end = min(len(content), byte_offset + 16)
-                    hex_context = content[start:end].hex(' ')
+            text = content.decode('utf-8', errors='ignore')
+            if required is not None and required not in text:
+                # No line of this member can match
+                return matches
+            # Search each candidate line, sliced from the text by offset
+            for i, start, end in _candidate_lines(candidate_regex, text):
+                line = text[start:end]
+                if required is not None and required not in line:
+                    continue
+                line_content = None
+                for match in regex.finditer(line):
+                    if line_content is None:
+                        # Build line text and context once, shared by every match on this line
+                        line_content = line.rstrip('\r')
+                        context_before = ()
+                        context_after = ()
+                        if self.context_lines > 0:
+                            context_before, context_after = _surrounding_lines(
+                                text, start, end, self.context_lines)
                     
+                    # Use archive_path/internal_path format
                     search_match = SearchMatch(
-                        file_path=file_path,
-                        line_number=byte_offset,  # Using offset as "line"
-                        line_content=f"Offset {byte_offset:08x}: {hex_context}",
+                        file_path=member_path,
+                        line_number=i + 1,
+                        line_content=line_content,
                         match_start=match.start(),
                         match_end=match.end(),
-                        context_before=[],
-                        context_after=[]
+                        context_before=context_before,
+                        context_after=context_after
                     )
                     matches.append(search_match)
-            except Exception:
-                pass
-            
-        except Exception:
+                    if max_hits and len(matches) >= max_hits:
+                        return matches
+        except _ARCHIVE_ERRORS as e:
+            # Skip members that can't be read (corrupt data, bad CRC, truncated stream)
+            logger.debug("Skipping archive member %s/%s: %r", file_path, member, e)
+        
+        return matches
+    
+    def _search_binary(self, file_path: str, regex: re.Pattern, max_hits: int = 0) -> List[SearchMatch]:
+        """Search binary files for hex patterns"""
+        matches = []
+        
+        binary_regex = self._binary_regex
+        required = self._required_text
+        if binary_regex is not None:
+            return self._search_binary_mapped(file_path, binary_regex, required, max_hits)
+        
+        try:
+            with open(file_path, 'rb') as f:
+                try:
+                    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:
+                    # Empty file - nothing to match
+                    return matches
+                with mm:
+                    # Non-ASCII patterns are matched against the decoded text, one chunk at a time
+                    spans = _decoded_spans(mm, regex, self.BINARY_SCAN_CHUNK, self.BINARY_SCAN_OVERLAP, required)
+                    for match_start, match_end in spans:
+                        # Text offset, used as the byte offset
+                        matches.append(self._hex_match(file_path, mm, match_start, match_start, match_end))
+                        if max_hits and len(matches) >= max_hits:
+                            break
+        except (OSError, ValueError):
+            # Skip files that can't be opened or mapped
+            pass
+        
+        return matches
+    
+    def _search_binary_mapped(self, file_path: str, binary_regex: re.Pattern,
+                              required: Optional[str] = None, max_hits: int = 0) -> List[SearchMatch]:
+        """
+        Search a memory-mapped binary file with a bytes regex, reporting true byte offsets
+        
+        required is text every match contains; files without it are skipped with one find.
+        """
+        matches = []
+        # The bytes regex reads each pattern character as one byte
+        needle = required.encode('latin-1') if required is not None and max(required) <= '\xff' else None
+        
+        try:
+            with open(file_path, 'rb') as f:
+                try:
+                    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:
+                    # Empty file - nothing to match
+                    return matches
+                with mm:
+                    if needle is not None and mm.find(needle) < 0:
+                        return matches
+                    for match in binary_regex.finditer(mm):
+                        matches.append(self._hex_match(file_path, mm, match.start(), match.start(), match.end()))
+                        if max_hits and len(matches) >= max_hits:
+                            # Leaving the loop releases the scan's hold on the mapping
+                            break
+        except (OSError, ValueError):
+            # Skip files that can't be opened or mapped
             pass
         
         return matches
     
+    @staticmethod
+    def _hex_match(file_path: str, buf, offset: int, start: int, end: int) -> SearchMatch:
+        """Build a hex search result for a match at offset in buf, spanning start to end"""
+        # Hex dump context (16 bytes before and after); bytes.hex formats in C,
+        # faster than hexlify plus decode or a per-byte lookup table
+        hex_context = buf[max(0, offset - 16):offset + 16].hex(' ')
+        return SearchMatch(
+            file_path=file_path,
+            line_number=offset,  # Using offset as "line"
+            line_content=f"Offset {offset:08x}: {hex_context}",
+            match_start=start,
+            match_end=end,
+            context_before=(),
+            context_after=()
+        )
+    
     def _is_network_path(self, path: str) -> bool:
         """Check if path is a network/UNC path"""
         # UNC paths start with \\
-        return path.startswith('\\\\') or path.startswith('//')
+        return path.startswith(('\\\\', '//'))
     
     def _check_network_path_accessible(self, path: str) -> bool:
         """Check if network path is accessible with timeout"""
-        # Check cache first
-        if path in self._network_path_cache:
-            return self._network_path_cache[path]
+        # Every path on a \\host\share answers the same, so probe and cache the share root
+        share_root = ntpath.splitdrive(path)[0] or path
+        key = share_root.replace('/', '\\').lower()  # Host and share names are case-insensitive
+        now = time.monotonic()
         
+        # Check cache first, including recent failures so a dead share isn't re-probed
+        cached = self._network_path_cache.get(key)
+        if cached is not None and cached[1] > now:
+            self._network_path_cache.move_to_end(key)
+            return cached[0]
+        
+        future = None
         try:
-            # Try to check if path exists with timeout
-            import concurrent.futures
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                future = executor.submit(os.path.exists, path)
-                accessible = future.result(timeout=self.network_timeout)
-                self._network_path_cache[path] = accessible
-                return accessible
+            # Try to check if the share exists with timeout
+            future = self._get_probe_pool().submit(os.path.exists, share_root)
+            accessible = future.result(timeout=self.network_timeout)
         except Exception:
             # If timeout or error, assume not accessible
-            self._network_path_cache[path] = False
-            return False
+            if future is not None:
+                future.cancel()
+            accessible = False
+        
+        ttl = self.network_cache_ttl if accessible else self.network_failure_ttl
+        self._network_path_cache[key] = (accessible, now + ttl)
+        self._network_path_cache.move_to_end(key)
+        while len(self._network_path_cache) > self.NETWORK_CACHE_SIZE:
+            self._network_path_cache.popitem(last=False)
+        return accessible
+    
+    @classmethod
+    def _get_probe_pool(cls) -> concurrent.futures.ThreadPoolExecutor:
+        """Get the network probe pool, creating it on first use"""
+        with cls._probe_pool_lock:
+            if cls._probe_pool is None:
+                cls._probe_pool = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=8, thread_name_prefix='netprobe')
+            return cls._probe_pool
+    
+    def cancel(self):
+        """Stop the running search as soon as possible"""
+        self._cancel_event.set()
+    
+    def close(self):
+        """Shut down the worker pools; they are recreated if the engine is used again"""
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=True)
+            self._thread_pool = None
+        with self._process_pool_lock:
+            pool, self._process_pool = self._process_pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+        with self._archive_pool_lock:
+            archive_pool, self._archive_pool = self._archive_pool, None
+        if archive_pool is not None:
+            archive_pool.shutdown(wait=True)
+        with SearchEngine._probe_pool_lock:
+            probe_pool, SearchEngine._probe_pool = SearchEngine._probe_pool, None
+        if probe_pool is not None:
+            # A probe stuck on an unreachable share must not hold up closing
+            probe_pool.shutdown(wait=False)
     
     def set_case_sensitive(self, enabled: bool):
         """Enable or disable case-sensitive search"""
@@ -809,10 +2276,29 @@ class SearchEngine:
         """Enable or disable binary/hex search mode"""
         self.hex_search = enabled
     
+    def set_binary_mode(self, mode: str):
+        """Set how text search handles binary files ('skip', 'auto' or 'text')"""
+        if mode not in self.BINARY_MODES:
+            raise ValueError(f"Unknown binary mode: {mode}")
+        self.binary_mode = mode
+    
+    def set_regex_engine(self, name: str):
+        """Set the whole-file candidate scan engine: 're', 'auto', or 'pcre2', 're2' or 'hyperscan' if installed"""
+        if name not in _REGEX_BACKENDS:
+            raise ValueError(f"Regex engine not available: {name}")
+        self._scan_backend = _REGEX_BACKENDS[name]
+    
     def clear_network_cache(self):
         """Clear the network path accessibility cache"""
         self._network_path_cache.clear()
     
+    def clear_regex_cache(self):
+        """Clear the compiled pattern caches shared by all searches"""
+        self._compile.cache_clear()
+        for cached in (_compile_bytes, _byte_scan_plan, _literal_automaton,
+                       _joined_candidate_regex, _required_literal):
+            cached.cache_clear()
+    
     def set_context_lines(self, lines: int):
         """Set number of context lines to include"""
         self.context_lines = max(0, lines)
@@ -820,7 +2306,19 @@ class SearchEngine:
     def set_file_extensions(self, extensions: List[str]):
         """Set file extensions to filter (e.g., ['.py', '.txt'])"""
         self.file_extensions = extensions
+        self._ext_tuple = tuple(extensions)
     
     def add_exclude_pattern(self, pattern: str):
-        """Add a pattern to exclude from search"""
+        """Add a pattern to exclude from search (raises re.error if it is not a valid regex)"""
+        if pattern in self.exclude_patterns:
+            # Already part of the combined regex
+            return
+        # Reject a bad pattern here, before it breaks the combined regex for every search
+        re.compile(pattern)
         self.exclude_patterns.append(pattern)
+        self._rebuild_exclude_re()
+
+
+def _extract_file_metadata_worker(file_path: str) -> Dict[str, Any]:
+    """Process pool entry point for file metadata extraction"""
+    return SearchEngine()._extract_file_metadata(file_path)
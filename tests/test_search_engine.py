@@ -0,0 +1,350 @@
+"""
+Tests for the search engine
+Run from the repository root with: python -m unittest discover -s tests
+"""
+import os
+import io
+import re
+import sqlite3
+import sys
+import tempfile
+import unittest
+import warnings
+from unittest import mock
+import zipfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import search_engine
+from search_engine import SearchEngine
+
+
+# Patterns whose braces or brackets other engines read differently from re
+DIVERGENT_CASES = [
+    (r'a[[:digit:]]', 'a:]\na5\nad]\n'),
+    (r'x[[:alpha:]]+y', 'x:]y\nxay\nx[:alpha:]]y\n'),
+    (r'a{ 2}', 'a{ 2}\naa\n'),
+    (r'a{,2}b', 'aab\na{,2}b\nb\n'),
+    (r'x{2, 3}', 'x{2, 3}\nxxx\n'),
+    (r'id{ 1,2 }=', 'id{ 1,2 }=\nidd=\n'),
+]
+
+# Ordinary patterns every engine compiles and reads the same way as re
+ENGINE_CASES = [
+    (r'foo[0-9]+bar', 'foo12bar\nfoobar\nxfoo3barx\n'),
+    (r'(ab|cd)+x', 'ababx\ncdx\nabx cdcdx\nax\n'),
+    (r'^err(or)?: [a-z]+$', 'error: disk\nerr: net\n  error: x\n'),
+    (r'colou?r', 'Colour and color\ncolr\n'),
+    (r'x{2,3}y', 'xxy\nxy\nxxxxy\n'),
+]
+
+
+def _hits(matches):
+    return [(m.line_number, m.match_start, m.match_end) for m in matches]
+
+
+class ScanBackendTests(unittest.TestCase):
+    """Every candidate scan engine must find the same matches as Python's re"""
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.root = self._dir.name
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def search(self, engine_name: str, pattern: str, text: str, case_sensitive: bool = True,
+               max_results: int = 0):
+        path = os.path.join(self.root, 'sample.txt')
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+        engine = SearchEngine()
+        engine.set_regex(True)
+        engine.set_case_sensitive(case_sensitive)
+        engine.set_regex_engine(engine_name)
+        engine.max_results = max_results
+        try:
+            with warnings.catch_warnings():
+                # "Possible nested set" from re for the POSIX-looking classes
+                warnings.simplefilter('ignore', FutureWarning)
+                return _hits(engine.search(path, pattern))
+        finally:
+            engine.close()
+
+    def assert_matches_re(self, engine_name: str, cases=DIVERGENT_CASES):
+        if engine_name not in search_engine._REGEX_BACKENDS:
+            self.skipTest(f'{engine_name} is not installed')
+        for pattern, text in cases:
+            for case_sensitive in (True, False):
+                with self.subTest(pattern=pattern, case_sensitive=case_sensitive):
+                    expected = self.search('re', pattern, text, case_sensitive)
+                    self.assertTrue(expected)
+                    self.assertEqual(self.search(engine_name, pattern, text, case_sensitive), expected)
+
+    def assert_engine_scans(self, engine_name: str):
+        """Ordinary patterns are scanned by the engine itself and match as they do with re"""
+        if engine_name not in search_engine._REGEX_BACKENDS:
+            self.skipTest(f'{engine_name} is not installed')
+        backend = search_engine._REGEX_BACKENDS[engine_name]
+        for pattern, _ in ENGINE_CASES:
+            for flags in (0, re.IGNORECASE):
+                with self.subTest(pattern=pattern, flags=flags):
+                    plan = search_engine._byte_scan_plan(pattern, re.compile(pattern, flags).flags, backend)
+                    self.assertIs(plan.backend, backend)
+                    self.assertNotIsInstance(plan.regex, re.Pattern)
+        self.assert_matches_re(engine_name, ENGINE_CASES)
+
+    def test_auto_matches_re(self):
+        self.assert_matches_re('auto')
+        self.assert_matches_re('auto', ENGINE_CASES)
+
+    def test_pcre2_matches_re(self):
+        self.assert_matches_re('pcre2')
+
+    def test_pcre2_scans_ordinary_patterns(self):
+        self.assert_engine_scans('pcre2')
+
+    def test_hyperscan_matches_re(self):
+        self.assert_matches_re('hyperscan')
+
+    def test_hyperscan_scans_ordinary_patterns(self):
+        self.assert_engine_scans('hyperscan')
+
+    @unittest.skipUnless(search_engine.HYPERSCAN_AVAILABLE, 'hyperscan is not installed')
+    def test_hyperscan_batches_dense_matches(self):
+        # Several candidates per line and many lines, so scans stop and resume between batches
+        text = ''.join(f'{i} ab aab ab\nnothing here\n' for i in range(50))
+        with mock.patch.object(search_engine._HyperscanBackend, 'SPAN_BATCH', 3):
+            for max_results in (0, 1, 7):
+                with self.subTest(max_results=max_results):
+                    expected = self.search('re', r'a+b', text, max_results=max_results)
+                    self.assertEqual(self.search('hyperscan', r'a+b', text, max_results=max_results), expected)
+
+    @unittest.skipUnless(search_engine.HYPERSCAN_AVAILABLE, 'hyperscan is not installed')
+    def test_hyperscan_finds_empty_lines(self):
+        # Empty matches end right after a newline, on the line that follows it
+        text = '\nab\n\n\nab \n\n'
+        with mock.patch.object(search_engine._HyperscanBackend, 'SPAN_BATCH', 1):
+            for pattern in (r'^$', r'^\s*$', r'b\s'):
+                with self.subTest(pattern=pattern):
+                    expected = self.search('re', pattern, text)
+                    self.assertTrue(expected)
+                    self.assertEqual(self.search('hyperscan', pattern, text), expected)
+
+    def test_re2_matches_re(self):
+        self.assert_matches_re('re2')
+
+    def test_re2_scans_ordinary_patterns(self):
+        self.assert_engine_scans('re2')
+
+    def test_divergent_patterns_keep_re(self):
+        for engine_name, backend in search_engine._REGEX_BACKENDS.items():
+            for pattern, _ in DIVERGENT_CASES:
+                with self.subTest(engine=engine_name, pattern=pattern):
+                    self.assertEqual(search_engine._plan_backend(pattern, backend).name, 're')
+
+    def test_auto_keeps_re_for_simple_patterns(self):
+        auto = search_engine._REGEX_BACKENDS['auto']
+        self.assertEqual(search_engine._plan_backend(r'foo\d*bar', auto).name, 're')
+        self.assertEqual(search_engine._plan_backend(r'[A-Z]+_[0-9]{2}', auto).name, 're')
+
+    @unittest.skipUnless(search_engine.PCRE2_AVAILABLE, 'pcre2 is not installed')
+    def test_auto_uses_pcre2_for_backtracking_patterns(self):
+        auto = search_engine._REGEX_BACKENDS['auto']
+        self.assertEqual(search_engine._plan_backend(r'(ab|cd)+x', auto).name, 'pcre2')
+        self.assertEqual(search_engine._plan_backend(r'(ab|cd){ 2}x', auto).name, 're')
+        self.assertEqual(search_engine._plan_backend(r'ab|cd', auto).name, 're')
+
+    @unittest.skipUnless(search_engine.PCRE2_AVAILABLE, 'pcre2 is not installed')
+    def test_pcre2_scans_large_files_with_re(self):
+        with mock.patch.object(search_engine._Pcre2Backend, 'MAX_SCAN_SIZE', 0):
+            self.assert_matches_re('pcre2')
+            self.assert_matches_re('pcre2', ENGINE_CASES)
+
+
+class DirectorySearchTests(unittest.TestCase):
+    """Searching a tree in parallel still honours the result limit"""
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.root = self._dir.name
+        for i in range(200):
+            with open(os.path.join(self.root, f'file{i:03}.txt'), 'w', encoding='utf-8') as f:
+                f.write('hit\n' * 10)
+        self.engine = SearchEngine()
+
+    def tearDown(self):
+        self.engine.close()
+        self._dir.cleanup()
+
+    def test_max_results_caps_parallel_search(self):
+        self.engine.max_results = 5
+        for workers in (32, 1):
+            with self.subTest(workers=workers):
+                self.engine.max_workers = workers
+                self.assertEqual(len(self.engine.search(self.root, 'hit')), 5)
+
+    def test_unlimited_search_finds_everything(self):
+        self.assertEqual(len(self.engine.search(self.root, 'hit')), 2000)
+
+
+class ExcludePatternTests(unittest.TestCase):
+    """Exclude patterns behave as they would on their own, whatever they are combined with"""
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.root = self._dir.name
+        for name in ('a.txt', 'b.LOG', 'c.bak'):
+            with open(os.path.join(self.root, name), 'w', encoding='utf-8') as f:
+                f.write('needle\n')
+        self.engine = SearchEngine()
+
+    def tearDown(self):
+        self.engine.close()
+        self._dir.cleanup()
+
+    def found_names(self):
+        return sorted(os.path.basename(m.file_path) for m in self.engine.search(self.root, 'needle'))
+
+    def test_global_flags_and_repeated_group_names(self):
+        self.engine.add_exclude_pattern(r'(?i)\.log$')
+        self.engine.add_exclude_pattern(r'(?P<ext>\.swp$)')
+        self.engine.add_exclude_pattern(r'(?P<ext>\.bak$)')
+        self.assertEqual(self.found_names(), ['a.txt'])
+
+    def test_invalid_pattern_is_rejected(self):
+        with self.assertRaises(re.error):
+            self.engine.add_exclude_pattern('(')
+        self.assertEqual(self.found_names(), ['a.txt', 'b.LOG', 'c.bak'])
+
+    def test_walker_failure_reaches_caller(self):
+        def failing_walk(root_path):
+            raise RuntimeError('walk failed')
+            yield
+        self.engine._iter_files = failing_walk
+        with self.assertRaises(RuntimeError):
+            self.engine.search(self.root, 'needle')
+
+
+class ArchiveTests(unittest.TestCase):
+    """A damaged archive is skipped without aborting the rest of the search"""
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.root = self._dir.name
+        with open(os.path.join(self.root, 'notes.txt'), 'w', encoding='utf-8') as f:
+            f.write('needle\n')
+        self.engine = SearchEngine()
+        self.engine.set_search_in_archives(True)
+
+    def tearDown(self):
+        self.engine.close()
+        self._dir.cleanup()
+
+    def write_zip(self, name: str, corrupt) -> None:
+        """Write a zip holding one matching member, then damage its bytes with corrupt"""
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as zf:
+            zf.writestr('inner.txt', 'needle in the archive\n')
+        data = bytearray(buffer.getvalue())
+        corrupt(data)
+        with open(os.path.join(self.root, name), 'wb') as f:
+            f.write(data)
+
+    def found_files(self):
+        matches = self.engine.search(self.root, 'needle')
+        return sorted(os.path.relpath(m.file_path, self.root).replace(os.sep, '/') for m in matches)
+
+    def test_unsupported_zip_version_is_skipped(self):
+        def bump_version(data):
+            # Extract version in the central directory: 11.5, which zipfile refuses
+            data[data.find(b'PK\x01\x02') + 6] = 115
+        self.write_zip('bad_version.zip', bump_version)
+        with self.assertLogs(search_engine.logger, 'DEBUG') as logs:
+            self.assertEqual(self.found_files(), ['notes.txt'])
+        self.assertIn('bad_version.zip', logs.output[0])
+
+    def test_truncated_archive_is_skipped(self):
+        def truncate(data):
+            del data[len(data) // 2:]
+        self.write_zip('truncated.zip', truncate)
+        self.assertEqual(self.found_files(), ['notes.txt'])
+
+    def test_corrupt_member_is_skipped(self):
+        def flip_data(data):
+            # First byte of the stored member's data, so its CRC check fails
+            data[data.find(b'PK\x03\x04') + 30 + len('inner.txt')] ^= 0xFF
+        self.write_zip('bad_member.zip', flip_data)
+        with self.assertLogs(search_engine.logger, 'DEBUG') as logs:
+            self.assertEqual(self.found_files(), ['notes.txt'])
+        self.assertIn('bad_member.zip/inner.txt', logs.output[0])
+
+    def test_sound_archive_is_searched(self):
+        self.write_zip('good.zip', lambda data: None)
+        self.assertEqual(self.found_files(), ['good.zip/inner.txt', 'notes.txt'])
+
+
+class SqliteMetadataTests(unittest.TestCase):
+    """Database metadata is read through a read-only URI built from any file name"""
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def test_name_with_uri_characters(self):
+        path = os.path.join(self._dir.name, 'notes #1 ?%20.db')
+        conn = sqlite3.connect(path)
+        conn.execute('CREATE TABLE entries (body TEXT)')
+        conn.commit()
+        conn.close()
+        metadata = SearchEngine()._extract_file_metadata(path)
+        self.assertEqual(metadata.get('Tables'), 'entries')
+
+
+class BinarySearchTests(unittest.TestCase):
+    """Hex search finds what the pattern finds in the file's decoded text"""
+
+    CONTENT = (b'\x00\x01caf\xc3\xa9 1\xd9\xa3 x\xc2\xa0y \xe2\x84\xaaey '
+               b'\xc5\xbfum \xc3\xa9t\xc3\xa9 ab\xffcd MZ\x90\x00')
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._dir.name, 'sample.dat')
+        with open(self.path, 'wb') as f:
+            f.write(self.CONTENT)
+        self.engine = SearchEngine()
+        self.engine.set_regex(True)
+        self.engine.set_hex_search(True)
+
+    def tearDown(self):
+        self.engine.close()
+        self._dir.cleanup()
+
+    def assert_finds_decoded(self, pattern: str, case_sensitive: bool = True):
+        self.engine.set_case_sensitive(case_sensitive)
+        flags = 0 if case_sensitive else re.IGNORECASE
+        expected = len(re.findall(pattern, self.CONTENT.decode('utf-8', errors='ignore'), flags))
+        self.assertTrue(expected)
+        self.assertEqual(len(self.engine.search(self.path, pattern)), expected)
+
+    def test_unicode_classes_match_decoded_text(self):
+        for pattern in (r'caf\w', r'1\d', r'x\sy', r'\b 1', r'caf. 1', r'x[^a-z]y'):
+            with self.subTest(pattern=pattern):
+                self.assert_finds_decoded(pattern)
+
+    def test_ignorecase_matches_non_ascii_case_variants(self):
+        for pattern in ('key', 'sum', '[j-l]ey'):
+            with self.subTest(pattern=pattern):
+                self.assert_finds_decoded(pattern, case_sensitive=False)
+
+    def test_plain_ascii_patterns_scan_bytes(self):
+        self.assertIsNotNone(search_engine._binary_regex('MZ', 0))
+        self.assertIsNotNone(search_engine._binary_regex('caf', re.IGNORECASE))
+        self.assert_finds_decoded('MZ')
+        self.assert_finds_decoded('CAF', case_sensitive=False)
+
+
+if __name__ == '__main__':
+    unittest.main()